@@ -1,31 +1,61 @@
 """중고거래 매물 탐색과 문의 작성을 자동화하는 메인 에이전트."""
 
-from typing import List, Dict, TypedDict, Optional, Union, Any
-from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_core.messages import AIMessage, ToolMessage, HumanMessage, AnyMessage, SystemMessage
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-import json, subprocess, time, hashlib, argparse, sys, os
+from typing import List, Dict, TypedDict, Optional, Union, Any, TYPE_CHECKING
+from functools import lru_cache
+import json, subprocess, time, hashlib, argparse, sys, os, random
 from pydantic import BaseModel
 from run_container import run_container
 from gpt_call import gpt_call
-from dotenv import load_dotenv
+from fingerprint import FingerprintIndex, DEFAULT_THRESHOLD, url_key
+from relevance import get_filter, DEFAULT_MIN_SCORE
+from inquiry import compose_inquiries
+from topk import TopKDeals, DEFAULT_K
+from listing_table import ListingTable
+
+# langgraph / langchain_* / openai 는 import 비용이 크므로 실제 사용 시점에 불러온다.
+# (--help, 인자 오류, 짧은 watch 프로세스의 기동 시간을 줄이기 위함)
+if TYPE_CHECKING:
+    from langchain_core.messages import AIMessage
 
 class Item(BaseModel):
     name: str
     description: str
     price: float
     url: str
+    region: str = ""                    # 수집 지역 (현재 매물 검색 시 태깅)
+    availability: str = "InStock"       # 판매 상태 (현재 매물 검색: InStock | SoldOut)
+
+# 현재 매물 기본 검색 지역 (예: "중학동-6317")
+DEFAULT_REGIONS = ["문정동-6184"]
+
+# search-list 컨테이너 안의 아카이브 마운트 위치
+ARCHIVE_MOUNT = "/archive"
+
+def _search_list_run(env: Dict[str, str]) -> Union[List, Dict]:
+    """search-list 컨테이너 실행. ARCHIVE_DIR(호스트 경로)이 설정되어 있으면 수집 페이지를 그곳에 아카이브한다."""
+    archive_dir = (os.getenv("ARCHIVE_DIR") or "").strip()
+    if not archive_dir:
+        return run_container("search-list", env)
+    host = os.path.abspath(archive_dir)
+    os.makedirs(host, exist_ok=True)
+    return run_container("search-list", {**env, "ARCHIVE_DIR": ARCHIVE_MOUNT}, volumes={host: ARCHIVE_MOUNT})
 
 # ===== 유틸: 매물 지문(fingerprint) =====
 def _fp(item: Item) -> str:
+    """매물 식별자: URL 기준, URL이 없으면 이름|가격 해시로 대체."""
+    key = url_key(item.url)
+    if key:
+        return key
     base = f"{item.name}|{item.price}"
     return hashlib.sha1(base.encode("utf-8")).hexdigest()[:16]
 
+def _deal_score(item: Item, reasonable_price: float) -> float:
+    """기준가 대비 할인율. 클수록 좋은 딜 (기준가보다 비싸면 음수)."""
+    return (reasonable_price - item.price) / reasonable_price
+
 # --------- 상태 ---------
 class AgentState(TypedDict, total=False):
-    messages: List[AnyMessage]          # LLM/툴 호출 로그 (AIMessage/ToolMessage)
+    messages: List[Any]                 # LLM/툴 호출 로그 (AIMessage/ToolMessage)
     item_name: str                      # 타겟 상품명
     all_item_list: List[Item]           # 과거 거래 내역 (적정가 산출 전용)
     reasonable_price: float             # '살만하다'고 판단한 기준가(원)
@@ -34,14 +64,21 @@ class AgentState(TypedDict, total=False):
     inquiry_text: str                   # 선호/설정 및 생성된 문의문 등
 
     # --- 폴링/탐지용 추가 ---
-    seen_fingerprints: List[str]        # 지금까지 본 매물 지문(중복 방지)
+    fp_index: FingerprintIndex          # 지금까지 본 매물 지문 + 재등록 탐지용 LSH 인덱스
+    dup_threshold: float               # 재등록 판정 MinHash 유사도 임계값
+    min_relevance: float                # 관련도 필터 최소 상품명 포함률 (문자 n-gram)
     sailing_item_list: List[Item]       # 현재 판매 매물 (딜 탐색 전용)
     poll_seconds: int                   # 폴링 주기(초). 예: 60
     max_polls: int                      # 최대 폴링 횟수(0 또는 None이면 무제한)
     polls_done: int                     # 누적 폴링 횟수
+    regions: List[str]                  # 현재 매물 검색 대상 지역 목록 (동시 검색)
+    top_deals: TopKDeals                # 폴링 간 누적되는 상위 K개 딜 랭킹
+    listings: ListingTable              # URL별 최초 발견 시각/가격 이력/판매 상태 전이
+    fetch_errors: int                   # 연속 수집 실패 횟수 (폴링 백오프용)
+    retry_after: Optional[float]        # 서버가 요구한 최소 대기(초)
 
 
-def _fill_tool_args(state: AgentState, ai_message: AIMessage) -> AIMessage:
+def _fill_tool_args(state: AgentState, ai_message: "AIMessage") -> "AIMessage":
     """툴 호출 인자 누락 시 state 값으로 자동 보정 + 필수 값 검증"""
     if not hasattr(ai_message, "tool_calls") or not ai_message.tool_calls:
         return ai_message
@@ -55,6 +92,10 @@ def _fill_tool_args(state: AgentState, ai_message: AIMessage) -> AIMessage:
             args.setdefault("item_name", state.get("item_name"))
             args.setdefault("all_item_list", [i.model_dump() for i in state.get("all_item_list", [])])
 
+        elif name == "search_target_region_listings":
+            # 검색 지역은 사용자 설정(CLI)을 따른다 → 모델이 임의로 정하지 않도록 덮어쓴다
+            args["regions"] = list(state.get("regions") or DEFAULT_REGIONS)
+
         elif name == "find_deal":
             args.setdefault("item_name", state.get("item_name"))
             args.setdefault("sailing_item_list", [i.model_dump() for i in state.get("sailing_item_list", [])])
@@ -65,6 +106,8 @@ def _fill_tool_args(state: AgentState, ai_message: AIMessage) -> AIMessage:
             args.setdefault("name", cand.name)
             args.setdefault("description", cand.description)
             args.setdefault("price", cand.price)
+            if cand.url:  # 캐시 키를 리포트/파이프라인 경로와 맞춤 (빈 값은 필수 인자 누락으로 오인되므로 생략)
+                args.setdefault("url", cand.url)
         
         if any(v in (None, "", []) for v in args.values()):
             print(f"⚠️ [인자 보정] '{name}' 호출이 필수 인자 누락으로 무시됩니다: {args}")
@@ -76,9 +119,34 @@ def _fill_tool_args(state: AgentState, ai_message: AIMessage) -> AIMessage:
     ai_message.tool_calls = valid_tool_calls
     return ai_message
 
+def _unpack_search_result(data: Any):
+    """search-list 결과를 (매물 목록, 오류) 로 분리한다.
+
+    수집 실패는 ``{"error": {...}, "items": [...]}`` 형태로 오며, items에는 성공한 지역/페이지의 매물이 담긴다.
+    """
+    if isinstance(data, dict) and "error" in data:
+        err = data["error"] if isinstance(data["error"], dict) else {"message": str(data["error"])}
+        return list(data.get("items") or []), err
+    return (data if isinstance(data, list) else [data]), None
+
+def _listing_dict(x: Dict, current: bool = False) -> Dict:
+    d = {
+        "name": x.get("name",""),
+        "description": x.get("description",""),
+        "price": float(x.get("price",0)),
+        "url": x.get("url",""),
+    }
+    if current:
+        d["region"] = x.get("region","")
+        d["availability"] = x.get("availability") or "InStock"
+    return d
+
+def _is_sold_out(x: Any) -> bool:
+    return (x.get("availability") if isinstance(x, dict) else getattr(x, "availability", "")) == "SoldOut"
+
 # --------- 툴 정의 ---------
-@tool
-def search_all_listings(item_name: str) -> List[Dict]:
+# 툴 본체는 순수 함수로 두고, langchain 툴 래핑은 _get_tools()에서 최초 사용 시 수행한다.
+def search_all_listings(item_name: str) -> Union[List[Dict], Dict]:
     """
     목적:
         상품명(item_name)으로 전체 지역의 '과거 거래 완료' 매물을 모두 검색한다.
@@ -90,59 +158,54 @@ def search_all_listings(item_name: str) -> List[Dict]:
         - item_name: 구매할 상품명 (예: "아이폰 14 프로")
     출력:
         - [{name: str, description: str, price: float, url: str}, ...]
+        - 수집 실패 시 {"error": {...}, "items": [...]} (items는 부분 결과)
     주의:
         - 반환 목록이 비어 있으면 이후 단계에서 적정가를 계산할 수 없다.
     """
     print(f"📦 [검색 단계] '{item_name}' 키워드로 모든 과거 매물을 검색합니다.")
 
     env = {"ITEM_NAME": item_name, "MODE": "ALL"}
-    data = run_container("search-list", env) or []
-    listings = data if isinstance(data, list) else [data]
-    result = [
-        {
-            "name": x.get("name",""),
-            "description": x.get("description",""),
-            "price": float(x.get("price",0)),
-            "url": x.get("url", "")
-        }
-        for x in listings
-    ]
+    data = _search_list_run(env) or []
+    listings, err = _unpack_search_result(data)
+    result = [_listing_dict(x) for x in listings]
+    if err:
+        print(f"⚠️ [검색 오류] 과거 매물 수집 실패: {err.get('message')} (수집된 {len(result)}건)")
+        return {"error": err, "items": result}
     print(f"🔍 [검색 결과] 총 {len(result)}건의 과거 매물을 찾았습니다.")
     return result
 
-@tool
-def search_target_region_listings(item_name: str) -> List[Dict]:
+def search_target_region_listings(item_name: str, regions: List[str]) -> Union[List[Dict], Dict]:
     """
     목적: 
-        - 상품명(item_name)으로 현재 판매 중인 매물을 검색한다.
+        - 상품명(item_name)으로 지정한 지역들의 현재 판매 중인 매물을 한 번에 검색한다.
     호출 조건:
         - 초기 적정가 산출이 완료된 이후 호출한다.
         - 폴링 시점마다 신규 매물 탐색에 사용한다.
     입력:
         - item_name: 구매할 상품명
+        - regions: 검색 지역 목록 (예: ["문정동-6184"]). 생략 시 설정값 사용
     출력:
-        - [{name: str, description: str, price: float, url: str}, ...]
+        - [{name: str, description: str, price: float, url: str, region: str, availability: str}, ...]
+          (availability가 "SoldOut"인 매물은 판매 완료 표시용이며 딜 후보가 아님)
+        - 수집 실패 시 {"error": {...}, "items": [...]} (items는 부분 결과)
     """
-    print(f"📦 [검색 단계] '{item_name}' 키워드로 현재 판매 중인 매물을 검색합니다.")
-    #env = {"ITEM_NAME": item_name, "MODE": "CURRENT", "REGION": "중학동-6317"}
-    env = {"ITEM_NAME": item_name, "MODE": "CURRENT", "REGION": "문정동-6184"}
+    regions = list(regions or DEFAULT_REGIONS)
+    print(f"📦 [검색 단계] '{item_name}' 키워드로 {len(regions)}개 지역의 현재 판매 중인 매물을 검색합니다.")
+    # 여러 지역은 search-list 컨테이너 1회 실행 안에서 동시에 요청한다
+    env = {"ITEM_NAME": item_name, "MODE": "CURRENT", "REGION": ",".join(regions)}
     
-    data = run_container("search-list", env) or []
-    listings = data if isinstance(data, list) else [data]
-    result = [
-        {
-            "name": x.get("name",""),
-            "description": x.get("description",""),
-            "price": float(x.get("price",0)),
-            "url": x.get("url","")
-        }
-        for x in listings
-    ]
+    data = _search_list_run(env) or []
+    listings, err = _unpack_search_result(data)
+    result = [_listing_dict(x, current=True) for x in listings]
     time.sleep(5)
-    print(f"🔍 [검색 결과] 총 {len(result)}건의 현재 판매 중인 매물을 찾았습니다.")
+    if err:
+        # "매물 없음"과 구분: 에이전트가 폴링 간격을 늘리도록 오류를 그대로 전달
+        print(f"⚠️ [검색 오류] 현재 매물 수집 실패: {err.get('message')} (수집된 {len(result)}건)")
+        return {"error": err, "items": result}
+    sold = sum(map(_is_sold_out, result))
+    print(f"🔍 [검색 결과] 총 {len(result) - sold}건의 현재 판매 중인 매물을 찾았습니다. (판매 완료 {sold}건)")
     return result
 
-@tool
 def estimate_price(item_name: str, all_item_list: List[Dict]) -> float:
     """과거 거래 목록을 기반으로 합리적인 적정가를 계산한다."""
     print("💰 [가격 분석] 적정가를 계산합니다.")
@@ -183,7 +246,6 @@ def estimate_price(item_name: str, all_item_list: List[Dict]) -> float:
         print(f"⚠️ [가격 분석] GPT 호출 중 오류 발생: {e}")
         return 0.0
 
-@tool
 def find_deal(item_name: str, sailing_item_list: List[Dict], reasonable_price: float) -> Dict:
     """현재 매물 목록에서 기준가 이하의 최적 매물을 선택한다."""
     print(f"🎯 [딜 탐색] 기준가 {reasonable_price:,.0f}원에 부합하는 매물을 찾습니다.")
@@ -243,11 +305,10 @@ def find_deal(item_name: str, sailing_item_list: List[Dict], reasonable_price: f
         print(f"⚠️ [딜 탐색] GPT 호출 중 오류 발생: {e}")
         return {}
 
-@tool
-def compose_inquiry(name: str, description: str, price: float) -> str:
+def compose_inquiry(name: str, description: str, price: float, url: str = "") -> str:
     """
     목적: 
-        - 매물 정보(name, description, price)를 바탕으로 Ollama(gpt-oss:20b) 모델을 호출해 판매자에게 보낼 정중한 문의문을 생성한다.
+        - 매물 정보(name, description, price, url)를 바탕으로 Ollama(gpt-oss:20b) 모델을 호출해 판매자에게 보낼 정중한 문의문을 생성한다.
     호출 조건:
         - find_deal에서 매물 1건이 확정된 경우에만 호출
         - 출력 문장은 2~3문장, 존댓말, 거래 의사 포함
@@ -258,52 +319,35 @@ def compose_inquiry(name: str, description: str, price: float) -> str:
     """
     print(f"✏️ [문의 작성] '{name}' 매물에 대한 판매자 문의문을 작성합니다.")
 
-    prompt = f"""
-너는 중고거래 플랫폼에서 판매자에게 보낼 정중한 문의문을 작성하는 구매자이다.
-아래의 매물정보를 확인해 구매 문구를 작성한다.
-
-[매물 정보]
-- 상품명: {name}
-- 설명: {description}
-- 가격: {price:,.0f}원
-
-[작성 조건]
-1. 존댓말 사용
-2. 2~3문장
-3. 구매 의사와 거래 가능 여부를 묻는 표현 포함
-4. 가격 흥정은 언급하지 말 것
-5. 부가 설명, 서론 금지 — 바로 거래 의사를 전달
-
-출력: 문의문만 작성, 따옴표 없이
-"""
-
-    result = run_container("gpt-oss-20b-ollama", {"PROMPT": prompt})
-    # run_container 결과 파싱
-    if isinstance(result, dict):
-        inquiry_text = result.get("text") or result.get("message") or ""
-    elif isinstance(result, (str, bytes)):
-        inquiry_text = result.decode() if isinstance(result, bytes) else result
-    elif isinstance(result, list) and result:
-        inquiry_text = str(result[0])
-    else:
-        inquiry_text = ""
-    inquiry_text = inquiry_text.strip()
+    # 단건도 일괄 생성 경로를 사용 → 내용이 같은 매물은 캐시된 문의문을 재사용
+    # (캐시 키에 url이 포함되므로 리포트/파이프라인과 같은 필드를 넘겨야 같은 매물로 인식된다)
+    inquiry_text = compose_inquiries([{"name": name, "description": description, "price": price, "url": url}])[0]
 
     print(f"📨 [문의 작성] 작성된 문구: {inquiry_text}")
     return inquiry_text
 
-TOOLS = [search_all_listings, search_target_region_listings, estimate_price, find_deal, compose_inquiry]
-tool_node = ToolNode(TOOLS)
+TOOL_FUNCS = [search_all_listings, search_target_region_listings, estimate_price, find_deal, compose_inquiry]
+
+@lru_cache(maxsize=1)
+def _get_tools() -> list:
+    """툴 함수들을 langchain 툴로 래핑한다. (최초 호출 시 1회)"""
+    from langchain_core.tools import tool
+    return [tool(f) for f in TOOL_FUNCS]
 
 # --------- LLM(툴 바인딩) ---------
-model = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0
-).bind_tools(TOOLS)
+@lru_cache(maxsize=1)
+def _get_model():
+    """툴이 바인딩된 정책 모델을 생성한다. (최초 호출 시 1회)"""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0
+    ).bind_tools(_get_tools())
 
 # --------- 정책 노드(모델 호출) ---------
 def policy(state: AgentState) -> AgentState:
     """현재 상태를 요약하고 다음에 실행할 툴을 결정하는 정책 노드."""
+    from langchain_core.messages import AIMessage, ToolMessage, HumanMessage, SystemMessage
 
     print("🤖 [정책 노드] 현재 상태를 바탕으로 다음 행동을 계획합니다.")
     print("    =========== 현재 상태 ===========")
@@ -322,7 +366,7 @@ def policy(state: AgentState) -> AgentState:
     raw_msgs = state.get("messages", [])
 
     # === 최근 툴 호출 내역 ===
-    tail: List[AnyMessage] = []
+    tail: List[Any] = []
     for i in range(len(raw_msgs) - 1, -1, -1):
         m = raw_msgs[i]
         if isinstance(m, AIMessage) and getattr(m, "tool_calls", None):
@@ -346,6 +390,7 @@ def policy(state: AgentState) -> AgentState:
         "최종 딜 존재 여부": bool(state.get("deal_candidate")),
         "폴링 횟수": int(state.get("polls_done", 0)),
         "최대 폴링 횟수": state.get("max_polls"),
+        "연속 수집 오류 횟수": int(state.get("fetch_errors", 0)),
     }
 
     sys = SystemMessage(content="""
@@ -380,7 +425,7 @@ def policy(state: AgentState) -> AgentState:
 
     call_msgs = [sys, summary, *tail] if tail else [sys, summary]
 
-    ai = model.invoke(call_msgs)
+    ai = _get_model().invoke(call_msgs)
     ai = _fill_tool_args(state, ai)
     if hasattr(ai, "tool_calls") and ai.tool_calls:
         print(f"   → AGENT 정책 모델이 선택한 툴: {[t['name'] for t in ai.tool_calls]}")
@@ -400,8 +445,157 @@ def _parse_tool_content(content: Any):
             return content
     return content
 
+def _split_fetch_result(out: Any) -> tuple:
+    """검색 툴 결과를 (매물 목록, 실패 여부)로 나눈다."""
+    if isinstance(out, dict) and "error" in out:
+        return list(out.get("items") or []), True
+    return (out if isinstance(out, list) else []), False
+
+def _note_fetch_result(state: AgentState, out: Any) -> tuple:
+    """검색 툴 결과에서 오류를 분리해 백오프 상태를 갱신하고 (매물 목록, 실패 여부)를 반환한다."""
+    if isinstance(out, dict) and "error" in out:
+        err = out.get("error") or {}
+        state["fetch_errors"] = int(state.get("fetch_errors", 0)) + 1
+        state["retry_after"] = err.get("retry_after") if isinstance(err, dict) else None
+        print(f"   • 수집 오류 {state['fetch_errors']}회 연속: {err}")
+    else:
+        state["fetch_errors"] = 0
+        state["retry_after"] = None
+    return _split_fetch_result(out)
+
+def ingest_past_listings(state: AgentState, out: Any) -> List[Item]:
+    """과거 매물 검색 결과에서 관련 매물만 골라 Item 목록으로 돌려준다."""
+    out, _ = _note_fetch_result(state, out)
+    # 과거 매물은 적정가 계산용 → fingrprint 업데이트는 하지 않음
+    # 관련도 필터: 무관한 매물(다른 모델/브랜드, 액세서리, 구매글)은 estimate_price 전에 제외
+    flt = get_filter(state.get("item_name", ""), float(state.get("min_relevance", DEFAULT_MIN_SCORE)))
+    out, dropped = flt.split([x for x in out if isinstance(x, dict)])
+    if dropped:
+        print(f"   • 관련도 필터: {len(dropped)}건 제외 (예: {dropped[0][0].get('name')} - {dropped[0][1]})")
+    items: List[Item] = []
+    for x in out:
+        try:
+            items.append(Item.model_validate(x))
+        except Exception:
+            continue
+    return items
+
+def ingest_current_listings(state: AgentState, out: Any, note_errors: bool = True) -> List[Item]:
+    """현재 매물 검색 결과를 상태(지문 인덱스/매물 상태 테이블/상위 K 랭킹/백오프)에 반영하고
+    평가할 매물(신규 + 기준가 이하로 가격이 내려간 기존 매물)만 돌려준다.
+
+    그래프 리듀서와 파이프라인(dedup/filter 단계)이 함께 사용한다.
+    ``note_errors=False``면 백오프 상태는 갱신하지 않는다 (파이프라인 fetcher가 이미 반영).
+    """
+    if note_errors:
+        out, _ = _note_fetch_result(state, out)
+    else:
+        out, _ = _split_fetch_result(out)
+    # 현재 매물은 신규 탐지 대상 → fingerprint 업데이트
+    items: List[Item] = []
+    sold_keys: List[str] = []               # 검색 결과에 판매 완료로 표시된 매물 (딜 후보 아님)
+    for x in out:
+        try:
+            it = Item.model_validate(x)
+        except Exception:
+            continue
+        if _is_sold_out(it):
+            sold_keys.append(_fp(it))
+        else:
+            items.append(it)
+
+    # fingerprint 체크 → 신규만 추림 (이미 본 매물/같은 가격 이상의 재등록 글은 LLM 호출 전에 제외)
+    index = state.get("fp_index")
+    if index is None:
+        index = FingerprintIndex(float(state.get("dup_threshold", DEFAULT_THRESHOLD)))
+    table = state.get("listings")
+    if table is None:
+        table = ListingTable()
+    prices: Dict[str, float] = {}           # 이번 폴링에서 먼저 본 매물 가격 (테이블 반영 전)
+    repost_of: Dict[str, str] = {}          # 재등록 글 키 → 원본 매물 키
+    newly_found: List[Item] = []
+    reposts = cheaper_reposts = 0
+    for it in items:
+        key = _fp(it)
+        status, matched = index.observe(key, it.name, it.description)
+        prices.setdefault(key, it.price)
+        if status == "new":
+            newly_found.append(it)
+        elif status == "repost":
+            repost_of[key] = matched
+            # 가격을 내려 다시 올린 글은 끌어올리기가 아니라 가격 인하 → 신규 매물처럼 평가
+            rec = table.get(matched)
+            matched_price = rec.price if rec is not None else prices.get(matched, float("inf"))
+            if it.price < matched_price:
+                newly_found.append(it)
+                cheaper_reposts += 1
+            else:
+                reposts += 1
+    if reposts:
+        print(f"   • 재등록(유사 매물) {reposts}건 제외")
+    if cheaper_reposts:
+        print(f"   • 가격을 내려 재등록한 매물 {cheaper_reposts}건 평가")
+
+    # 관련도 필터: 케이스/구매글/타 모델 등은 find_deal 전에 제외
+    if newly_found:
+        flt = get_filter(state.get("item_name", ""), float(state.get("min_relevance", DEFAULT_MIN_SCORE)))
+        dumped = [i.model_dump() for i in newly_found]
+        kept, dropped = flt.split(dumped, state.get("reasonable_price") or None)
+        if dropped:
+            print(f"   • 관련도 필터: {len(dropped)}건 제외 (예: {dropped[0][0].get('name')} - {dropped[0][1]})")
+        kept_ids = {id(x) for x in kept}
+        newly_found = [it for it, x in zip(newly_found, dumped) if id(x) in kept_ids]
+
+    # 매물 상태 테이블: 이전 폴링과의 차이(신규/가격 변경/판매 완료/재등장)만 계산
+    # 판매 완료는 명시적 SoldOut 상태로만 판정 (첫 페이지에서 밀려나 안 보이는 매물은 그대로 둔다)
+    changes = table.apply([(_fp(it), it) for it in items], sold_out=sold_keys)
+    for it in newly_found:
+        table.mark_relevant(_fp(it))
+    # 필터를 거치지 않은 재등록 글은 원본의 관련도 판정을 이어받는다 (이후 가격 인하 시 재평가 대상)
+    passed = {_fp(it) for it in newly_found}
+    for key, matched in repost_of.items():
+        old = table.get(matched)
+        if key not in passed and old is not None and old.relevant:
+            table.mark_relevant(key)
+
+    # 상위 K 딜 랭킹 + 재평가 대상: 신규 매물과 변경된 관련 매물만 다시 계산
+    tracker = state.get("top_deals")
+    if tracker is None:
+        tracker = TopKDeals(DEFAULT_K)
+    rp = float(state.get("reasonable_price") or 0)
+    held = {m for m in repost_of.values() if m in tracker}  # 원본이 판매 완료로 빠지기 전의 상위 K 여부
+    reevaluate: Dict[str, Item] = {}
+    for ch in changes:
+        rec = ch.record
+        if ch.kind == "sold_out":
+            tracker.remove(rec.key)
+        elif ch.kind in ("price", "relisted") and rec.relevant and rp > 0:
+            tracker.update(rec.key, _deal_score(rec.item, rp), rec.item)
+            # 기준가 이하로 가격이 내려갔거나, 기준가 이하 매물이 다시 판매 중이 되면 find_deal 재평가
+            dropped_below = ch.kind == "price" and rec.price < (ch.old_price or 0)
+            if rec.price <= rp and (dropped_below or ch.kind == "relisted"):
+                reevaluate[rec.key] = rec.item
+    if rp > 0:
+        for it in newly_found:
+            tracker.update(_fp(it), _deal_score(it, rp), it)
+    # 재등록 글이 원본의 상위 K 자리를 넘겨받는다 (같은 매물이 두 자리를 차지하지 않도록)
+    for key, matched in repost_of.items():
+        rec = table.get(key)
+        if matched in held and rec is not None and rec.relevant:
+            tracker.remove(matched)
+            if rp > 0:
+                tracker.update(key, _deal_score(rec.item, rp), rec.item)
+    if reevaluate:
+        print(f"   • 가격 인하/재판매 매물 {len(reevaluate)}건 재평가")
+    state["top_deals"] = tracker
+    state["listings"] = table
+
+    state["fp_index"] = index
+    return [*newly_found, *reevaluate.values()]
+
 def reduce_observation(state: AgentState) -> AgentState:
     """툴 실행 결과를 해석해 AgentState에 반영하는 리듀서."""
+    from langchain_core.messages import ToolMessage
 
     msgs = state.get("messages", [])
     last_idx = int(state.get("_last_msg_idx", 0))
@@ -419,38 +613,13 @@ def reduce_observation(state: AgentState) -> AgentState:
         out = _parse_tool_content(m.content)
         print(f"   • 툴 반환값: {str(out)[:100]}{'...' if len(str(out)) > 100 else ''}")
         
-        if tool_name == "search_all_listings" and isinstance(out, list):
-            # 과거 매물은 적정가 계산용 → fingrprint 업데이트는 하지 않음
-            items: List[Item] = []
-            for x in out:
-                try:
-                    items.append(Item.model_validate(x))
-                except Exception:
-                    continue
-            state["all_item_list"] = items
+        if tool_name == "search_all_listings" and isinstance(out, (list, dict)):
+            state["all_item_list"] = ingest_past_listings(state, out)
             state["polls_done"] = int(state.get("polls_done", 0)) + 1
 
-        elif tool_name == "search_target_region_listings" and isinstance(out, list):
-            # 현재 매물은 신규 탐지 대상 → fingerprint 업데이트
-            items: List[Item] = []
-            for x in out:
-                try:
-                    items.append(Item.model_validate(x))
-                except Exception:
-                    continue
-
-            # fingerprint 체크 → 신규만 추림
-            seen = set(state.get("seen_fingerprints") or [])
-            newly_found: List[Item] = []
-            for it in items:
-                fp = _fp(it)
-                if fp not in seen:
-                    newly_found.append(it)
-                    seen.add(fp)
-
+        elif tool_name == "search_target_region_listings" and isinstance(out, (list, dict)):
             # state에는 신규 매물만 저장
-            state["sailing_item_list"] = newly_found
-            state["seen_fingerprints"] = list(seen)
+            state["sailing_item_list"] = ingest_current_listings(state, out)
             state["polls_done"] = int(state.get("polls_done", 0)) + 1
 
         elif tool_name == "estimate_price" and isinstance(out, (int, float)):
@@ -472,12 +641,25 @@ def reduce_observation(state: AgentState) -> AgentState:
     return state
 
 # --------- 대기 노드(폴링 템포) ---------
+MAX_BACKOFF_SECONDS = 600   # 수집 오류 시 백오프 상한(초)
+
+def next_poll_delay(state: AgentState) -> int:
+    """다음 검색까지 대기할 시간(초). 연속 수집 오류 시 지수 백오프(+지터), Retry-After 이상."""
+
+    sec = int(state.get("poll_seconds", 10) or 10)
+    errors = int(state.get("fetch_errors", 0))
+    if errors:
+        backoff = min(MAX_BACKOFF_SECONDS, sec * 2 ** min(errors, 6))
+        sec = int(max(backoff * random.uniform(0.8, 1.2), float(state.get("retry_after") or 0)))
+        print(f"⏳ [대기 단계] 수집 오류 {errors}회 연속 → {sec}초 동안 백오프합니다.")
+    else:
+        print(f"⏳ [대기 단계] {sec}초 동안 기다립니다. 다음 검색 시점을 준비합니다.")
+    return sec
+
 def wait_tick(state: AgentState) -> AgentState:
     """폴링 간격만큼 대기하는 노드."""
 
-    sec = int(state.get("poll_seconds", 10) or 10)
-    print(f"⏳ [대기 단계] {sec}초 동안 기다립니다. 다음 검색 시점을 준비합니다.")
-    time.sleep(sec)
+    time.sleep(next_poll_delay(state))
     return state
 
 # --------- 종료 판단 ---------
@@ -503,37 +685,143 @@ def _next_after_reduce(s: AgentState) -> str:
         return "END"
     last_tool = s.get("_last_tool")
 
+    # 수집 오류 → 바로 재호출하지 않고 wait에서 백오프
+    if last_tool in ("search_all_listings", "search_target_region_listings") and s.get("fetch_errors"):
+        return "wait"
+
     # 지역 매물 검색 했는데 딜 없으면 → wait (다시 poll)
     if last_tool == "search_target_region_listings" and not s.get("deal_found"):
         return "wait"
     return "policy"
 
 # --------- 그래프 ---------
-g = StateGraph(AgentState)
-g.add_node("policy", policy)
-g.add_node("tools", tool_node)
-g.add_node("reduce", reduce_observation)
-g.add_node("wait", wait_tick)
-
-g.add_edge(START, "policy")
-g.add_conditional_edges("policy", tools_condition, {"tools": "tools", "__end__": "wait"})
-g.add_edge("tools", "reduce")
-g.add_conditional_edges("reduce", _next_after_reduce, {"END": END, "policy": "policy", "wait": "wait"})
-g.add_edge("wait", "policy")
-
-app = g.compile()
+def build_graph():
+    """에이전트 그래프를 구성해 컴파일한다. main()에서 한 번만 호출한다."""
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.prebuilt import ToolNode, tools_condition
+
+    g = StateGraph(AgentState)
+    g.add_node("policy", policy)
+    g.add_node("tools", ToolNode(_get_tools()))
+    g.add_node("reduce", reduce_observation)
+    g.add_node("wait", wait_tick)
+
+    g.add_edge(START, "policy")
+    g.add_conditional_edges("policy", tools_condition, {"tools": "tools", "__end__": "wait"})
+    g.add_edge("tools", "reduce")
+    g.add_conditional_edges("reduce", _next_after_reduce, {"END": END, "policy": "policy", "wait": "wait"})
+    g.add_edge("wait", "policy")
+
+    return g.compile()
+
+# --------- 파이프라인 모드 ---------
+def run_pipeline_mode(state: AgentState, sinks: list, eval_workers: int = 2) -> AgentState:
+    """그래프 대신 이벤트 기반 파이프라인으로 실행한다.
+
+    적정가를 한 번 산출한 뒤 fetcher → dedup/filter → evaluator → drafter → notifier 단계를 큐로 연결해,
+    느린 find_deal/문의 작성이 다음 폴링을 지연시키지 않는다. 딜을 찾아도 종료하지 않고 계속 감시한다.
+    """
+    import asyncio
+    from pipeline import run_pipeline
+
+    item_name = state["item_name"]
+    state["all_item_list"] = ingest_past_listings(state, search_all_listings(item_name))
+    rp = estimate_price(item_name, [i.model_dump() for i in state["all_item_list"]])
+    state["reasonable_price"] = rp
+    if not rp:
+        print("⚠️ [파이프라인] 적정가를 산출하지 못해 감시를 시작하지 않습니다.")
+        return state
+
+    def fetch():
+        out = search_target_region_listings(item_name, state.get("regions") or DEFAULT_REGIONS)
+        # 다음 대기 시간(poll_delay)이 이번 결과의 오류를 보도록 필터 단계보다 먼저 반영
+        _note_fetch_result(state, out)
+        return out
+
+    def ingest(out) -> List[Item]:
+        state["polls_done"] = int(state.get("polls_done", 0)) + 1
+        return ingest_current_listings(state, out, note_errors=False)
+
+    def evaluate(batch: List[Item]) -> List[Dict]:
+        deal = find_deal(item_name, [i.model_dump() for i in batch], rp)
+        try:
+            cand = Item.model_validate(deal)
+        except Exception:
+            return []
+        # find_deal은 항상 하나를 고르므로 기준가 초과/입력에 없는 매물(모델이 지어낸 값)은 딜로 보지 않는다
+        if cand.price > rp or _fp(cand) not in {_fp(i) for i in batch}:
+            print(f"ℹ️ [파이프라인] 선택된 매물이 기준가 이하 딜이 아니어서 알리지 않습니다: {cand.name} {cand.price:,.0f}원")
+            return []
+        state["deal_candidate"], state["deal_found"] = cand, True
+        return [{"type": "deal", "item_name": item_name, "reasonable_price": rp, "item": cand.model_dump()}]
+
+    def top_snapshot() -> List[Item]:
+        # 이벤트 루프 스레드에서 호출 → ingest와 동시에 TopKDeals를 순회하지 않는다
+        tracker = state.get("top_deals")
+        return [it for score, it in tracker.ranked() if score >= 0] if tracker else []
+
+    def draft(ev: Dict, top: List[Item]) -> Dict:
+        # 선택된 딜과 기준가 이하 상위 K 후보의 문의문을 한 번의 모델 세션에서 함께 작성 (변경 없는 후보는 캐시)
+        key = _fp(Item.model_validate(ev["item"]))
+        others = [it.model_dump() for it in top if _fp(it) != key]
+        inquiry = compose_inquiries([ev["item"], *others])[0]
+        state["inquiry_text"] = inquiry
+        return {**ev, "inquiry": inquiry}
+
+    stats = asyncio.run(run_pipeline(
+        fetch=fetch,
+        ingest=ingest,
+        evaluate=evaluate,
+        sinks=sinks,
+        poll_delay=lambda: next_poll_delay(state),
+        draft=draft,
+        snapshot=top_snapshot,
+        max_polls=int(state.get("max_polls") or 0),
+        eval_workers=eval_workers,
+    ))
+    print(f"📊 [파이프라인] {stats}")
+    return state
 
 # ===== CLI 엔트리포인트 =====
+def _sink_spec(spec: str) -> str:
+    """--sink 값 검증 (argparse type). 잘못된 명세는 실행 전에 인자 오류로 알린다."""
+    from pipeline import parse_sink_spec
+    try:
+        parse_sink_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
 def main():
     """CLI로부터 입력을 받아 에이전트를 실행한다."""
 
-    load_dotenv()
     parser = argparse.ArgumentParser(description="중고거래 에이전트 (Tool-calling + Polling, one-shot CLI)")
     parser.add_argument("item_name", help="조회할 상품명 (예: '아이패드 에어 5')")
     parser.add_argument("--poll-seconds", type=int, default=10, help="폴링 주기(초). 기본 60")
     parser.add_argument("--max-polls", type=int, default=120, help="최대 폴링 횟수(0=무제한). 기본 10")
+    parser.add_argument("--regions", default=",".join(DEFAULT_REGIONS),
+                        help=f"현재 매물 검색 지역, 쉼표 구분(동시 검색). 기본 {','.join(DEFAULT_REGIONS)}")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_K,
+                        help=f"폴링 간 누적 추적할 상위 딜 수. 기본 {DEFAULT_K}")
+    parser.add_argument("--dup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"재등록 판정 유사도(0~1, 클수록 엄격). 기본 {DEFAULT_THRESHOLD}")
+    parser.add_argument("--min-relevance", type=float, default=DEFAULT_MIN_SCORE,
+                        help=f"제목에 포함되어야 하는 상품명 비율(0~1). 기본 {DEFAULT_MIN_SCORE}")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="이벤트 기반 파이프라인으로 계속 감시 (LLM 지연이 폴링 주기에 영향 없음)")
+    parser.add_argument("--sink", action="append", default=None, type=_sink_spec,
+                        help="파이프라인 알림 대상(반복 가능): stdout | jsonl:<경로> | webhook:<URL>. 기본 stdout")
+    parser.add_argument("--eval-workers", type=int, default=2, help="파이프라인 평가 단계 동시 실행 수. 기본 2")
+    parser.add_argument("--archive-dir", default=None,
+                        help="수집한 검색 페이지 원문을 저장할 호스트 디렉터리 (기본: 환경변수 ARCHIVE_DIR, 미설정 시 저장 안 함)")
     args = parser.parse_args()
 
+    # 인자 검증이 끝난 뒤에만 환경변수 로드/그래프 구성 (--help 등은 여기까지 오지 않음)
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.archive_dir:
+        os.environ["ARCHIVE_DIR"] = args.archive_dir
+
     init_state: AgentState = {
         "item_name": args.item_name,
         "messages": [],
@@ -541,15 +829,26 @@ def main():
         "reasonable_price": 0.0,
         "deal_candidate": None,
         "deal_found": False,
-        "seen_fingerprints": [],
+        "fp_index": FingerprintIndex(args.dup_threshold),
+        "dup_threshold": args.dup_threshold,
+        "min_relevance": args.min_relevance,
         "sailing_item_list": [],
         "poll_seconds": args.poll_seconds,
         "max_polls": args.max_polls,
         "polls_done": 0,
+        "top_deals": TopKDeals(args.top_k),
+        "listings": ListingTable(),
+        "regions": [r.strip() for r in args.regions.split(",") if r.strip()] or DEFAULT_REGIONS,
     }
 
-    # LangGraph 실행: stream으로 진행 상황을 소비(원하면 로그 추가 가능)
-    state = app.invoke(init_state, config={"recursion_limit": 1000})
+    if args.pipeline:
+        from pipeline import make_sink
+        sinks = [make_sink(spec) for spec in (args.sink or ["stdout"])]
+        state = run_pipeline_mode(init_state, sinks, eval_workers=args.eval_workers)
+    else:
+        # LangGraph 실행: stream으로 진행 상황을 소비(원하면 로그 추가 가능)
+        app = build_graph()
+        state = app.invoke(init_state, config={"recursion_limit": 1000})
     # 결과 출력
     print("\n[done] 실행 종료.")
     rp = state.get("reasonable_price")
@@ -571,6 +870,25 @@ def main():
     else:
         print(" - 이번 실행에서 딜을 찾지 못했습니다.")
 
+    table = state.get("listings")
+    if table is not None and len(table):
+        sold = len(table) - table.available_count
+        print(f"\n - 추적 매물 {len(table)}건 (판매 중 {table.available_count}건, 판매 완료 {sold}건)")
+
+    tracker = state.get("top_deals")
+    if tracker is not None and len(tracker):
+        ranked = tracker.ranked()
+        # 기준가 이하(점수 >= 0) 후보의 문의문만 한 번에 작성 (파이프라인 모드에서 이미 작성된 것은 캐시 재사용)
+        # 대상이 없으면 모델 컨테이너를 띄우지 않는다
+        drafts = [it for score, it in ranked if score >= 0]
+        texts = dict(zip(map(_fp, drafts), compose_inquiries([it.model_dump() for it in drafts]))) if drafts else {}
+        inquiries = [texts.get(_fp(it), "") for _, it in ranked]
+        print(f"\n[상위 {len(tracker)}개 딜 (기준가 대비 할인율)]")
+        for rank, ((score, it), text) in enumerate(zip(ranked, inquiries), 1):
+            print(f"   {rank}. {score:+.1%}  {it.name}  {it.price:,.0f}원  {it.url}")
+            if text:
+                print(f"      문의 문구: {text}")
+
 if __name__ == "__main__":
     try:
         main()
@@ -0,0 +1,93 @@
+"""`python -X importtime` 기반 에이전트 기동 시간 벤치마크.
+
+사용 예:
+    python bench_startup.py                  # app 모듈 import 비용 측정
+    python bench_startup.py --budget-ms 250  # 예산 초과 시 종료 코드 1
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 짧게 뜨고 죽는 watch 프로세스를 기준으로 한 기본 예산(ms)
+DEFAULT_BUDGET_MS = 300
+
+# 기동 시점에 import 되면 안 되는 무거운 모듈
+HEAVY_MODULES = ("langgraph", "langchain_core", "langchain_openai", "openai")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _importtime(module: str) -> List[Tuple[str, int, int, int]]:
+    """``-X importtime``으로 모듈을 import 하고 (이름, self_us, cumulative_us, depth) 목록을 반환."""
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"'{module}' import 실패 (종료 코드 {proc.returncode})")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        rows.append((name, self_us, cum_us, (len(indent) - 1) // 2))
+    return rows
+
+
+def _wall_ms(argv: List[str]) -> float:
+    """명령을 실행해 벽시계 시간(ms)을 측정한다."""
+
+    t0 = time.perf_counter()
+    subprocess.run(argv, cwd=HERE, capture_output=True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="에이전트 기동 시간(import time) 벤치마크")
+    parser.add_argument("--module", default="app", help="측정할 모듈. 기본 app")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"누적 import 시간 예산(ms). 기본 {DEFAULT_BUDGET_MS}")
+    parser.add_argument("--top", type=int, default=10, help="상위 N개 무거운 모듈 출력. 기본 10")
+    args = parser.parse_args()
+
+    rows = _importtime(args.module)
+    top_level: Dict[str, int] = {name: cum for name, _, cum, depth in rows if depth == 0}
+    total_ms = sum(top_level.values()) / 1000
+    target_ms = top_level.get(args.module, 0) / 1000
+
+    print(f"[importtime] '{args.module}' 누적: {target_ms:.1f}ms (인터프리터 포함 전체 {total_ms:.1f}ms)")
+    print(f"[importtime] 상위 {args.top}개 최상위 import:")
+    for name, cum in sorted(top_level.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"   {cum / 1000:8.1f}ms  {name}")
+
+    loaded = {name.split(".")[0] for name, *_ in rows}
+    leaked = [m for m in HEAVY_MODULES if m in loaded]
+
+    help_ms = _wall_ms([sys.executable, f"{args.module}.py", "--help"])
+    print(f"[wall] '{args.module}.py --help': {help_ms:.1f}ms")
+
+    ok = True
+    if leaked:
+        print(f"❌ 기동 시점에 무거운 모듈이 import 되었습니다: {', '.join(leaked)}")
+        ok = False
+    if target_ms > args.budget_ms:
+        print(f"❌ 예산 초과: {target_ms:.1f}ms > {args.budget_ms:.0f}ms")
+        ok = False
+    if ok:
+        print(f"✅ 예산 이내: {target_ms:.1f}ms <= {args.budget_ms:.0f}ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""매물 지문(fingerprint)과 재등록(repost) 탐지를 위한 MinHash + LSH 인덱스."""
+
+import hashlib
+import re
+import struct
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+NUM_PERM = 64                # MinHash 서명 길이
+BANDS, ROWS = 16, 4          # LSH 밴딩 (BANDS * ROWS == NUM_PERM)
+SHINGLE = 2                  # 문자 n-gram 크기 (짧은 한글 제목은 bigram이 안정적)
+DEFAULT_THRESHOLD = 0.7      # 재등록으로 판정할 추정 자카드 유사도
+
+_NON_WORD = re.compile(r"[^\w]+")
+_UNPACK = struct.Struct(f">{NUM_PERM}I").unpack
+
+Signature = Tuple[int, ...]
+
+
+def normalize(text: str) -> str:
+    """NFKC 정규화 + 소문자 + 특수문자/공백 제거."""
+
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _NON_WORD.sub("", text)
+
+
+def shingles(text: str, n: int = SHINGLE) -> set:
+    s = normalize(text)
+    if len(s) <= n:
+        return {s} if s else set()
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+@lru_cache(maxsize=1 << 16)
+def _shingle_hashes(shingle: str) -> Signature:
+    """shingle 하나에 대한 NUM_PERM개의 독립 32비트 해시. (제목 간 shingle 중복이 많아 캐시 효과가 큼)"""
+
+    return _UNPACK(hashlib.shake_128(shingle.encode("utf-8")).digest(NUM_PERM * 4))
+
+
+def minhash(text: str) -> Optional[Signature]:
+    """정규화한 텍스트의 MinHash 서명. 텍스트가 비어 있으면 None."""
+
+    sh = shingles(text)
+    if not sh:
+        return None
+    return tuple(map(min, zip(*(_shingle_hashes(x) for x in sh))))
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """두 서명의 일치 비율 = 자카드 유사도 추정치."""
+
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def url_key(url: str) -> str:
+    """쿼리/프래그먼트를 제거한 URL을 매물 식별자로 사용한다."""
+
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc}{parts.path.rstrip('/')}"
+
+
+class FingerprintIndex:
+    """URL 식별자 + MinHash LSH 기반 중복/재등록 탐지 인덱스.
+
+    서명을 ``BANDS``개 밴드로 나눠 밴드별 버킷에 넣고, 같은 버킷에 걸린 후보만 비교하므로
+    조회 비용이 누적 매물 수가 아닌 후보 수에 비례한다.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = min(max(float(threshold), 0.0), 1.0)
+        self._sigs: Dict[str, Optional[Signature]] = {}
+        self._buckets: List[Dict[Signature, List[str]]] = [defaultdict(list) for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sigs
+
+    @staticmethod
+    def _bands(sig: Signature):
+        for i in range(BANDS):
+            yield i, sig[i * ROWS:(i + 1) * ROWS]
+
+    def nearest(self, sig: Signature) -> Optional[Tuple[str, float]]:
+        """LSH 후보 중 임계값 이상으로 가장 유사한 (식별자, 유사도)를 찾는다."""
+
+        best: Optional[Tuple[str, float]] = None
+        checked = set()
+        for i, band in self._bands(sig):
+            for key in self._buckets[i].get(band, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                sim = similarity(sig, self._sigs[key])
+                if sim >= self.threshold and (best is None or sim > best[1]):
+                    best = (key, sim)
+        return best
+
+    def add(self, key: str, sig: Optional[Signature]) -> None:
+        if key in self._sigs:
+            return
+        self._sigs[key] = sig
+        if sig is None:  # 텍스트 없는 매물은 URL 식별만 사용
+            return
+        for i, band in self._bands(sig):
+            self._buckets[i][band].append(key)
+
+    def observe(self, key: str, name: str, description: str) -> Tuple[str, Optional[str]]:
+        """매물을 인덱스에 반영하고 판정 결과를 반환한다.
+
+        Returns:
+            (status, matched_key). status는 ``new``(신규), ``same``(이미 본 매물),
+            ``repost``(다른 URL의 유사 매물 재등록) 중 하나.
+        """
+
+        if key in self._sigs:
+            return "same", key
+        sig = minhash(f"{name} {description}")
+        match = self.nearest(sig) if sig is not None else None
+        # 재등록 글도 인덱스에 등록해, 같은 글을 다음 폴링에서 'same'으로 빠르게 거른다
+        self.add(key, sig)
+        if match:
+            return "repost", match[0]
+        return "new", None
@@ -2,16 +2,21 @@
 
 import os
 import json
+from functools import lru_cache
 from typing import Any, Literal
 
-from dotenv import load_dotenv
-from openai import OpenAI
 
-# .env 파일에 저장된 API 키 로드
-load_dotenv()
+@lru_cache(maxsize=1)
+def _get_client():
+    """OpenAI 클라이언트를 최초 호출 시 한 번만 생성한다.
 
-# 환경변수에서 읽은 API 키로 OpenAI 클라이언트 초기화
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    .env 로드는 호출 측(main)에서 담당하므로 여기서는 환경변수만 읽는다.
+    """
+
+    from openai import OpenAI
+
+    # 환경변수에서 읽은 API 키로 OpenAI 클라이언트 초기화
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 def gpt_call(
@@ -35,6 +40,7 @@ def gpt_call(
         모델 응답 문자열 또는 JSON(dict)
     """
 
+    client = _get_client()
     messages = []  # OpenAI ChatCompletion 형식 메시지 배열
     if system:
         # 시스템 메시지로 모델의 기본 역할을 지정
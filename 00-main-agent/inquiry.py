@@ -0,0 +1,129 @@
+"""판매자 문의문 일괄 생성 모듈.
+
+후보 N건의 프롬프트를 한 번의 gpt-oss-20b-ollama 컨테이너 실행(모델 1회 로드)으로 처리하고,
+매물 내용이 그대로인 경우 이전에 만든 문의문을 재사용한다.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from run_container import run_container
+
+_cache: Optional[Dict[str, str]] = None
+# 캐시 로드/갱신/저장과 컨테이너 실행을 직렬화 (여러 스레드가 20B 모델을 동시에 띄우거나 같은 .tmp 파일에 쓰지 않도록)
+_lock = threading.Lock()
+
+
+def build_prompt(name: str, description: str, price: float) -> str:
+    """매물 1건에 대한 문의문 생성 프롬프트."""
+
+    return f"""
+너는 중고거래 플랫폼에서 판매자에게 보낼 정중한 문의문을 작성하는 구매자이다.
+아래의 매물정보를 확인해 구매 문구를 작성한다.
+
+[매물 정보]
+- 상품명: {name}
+- 설명: {description}
+- 가격: {price:,.0f}원
+
+[작성 조건]
+1. 존댓말 사용
+2. 2~3문장
+3. 구매 의사와 거래 가능 여부를 묻는 표현 포함
+4. 가격 흥정은 언급하지 말 것
+5. 부가 설명, 서론 금지 — 바로 거래 의사를 전달
+
+출력: 문의문만 작성, 따옴표 없이
+"""
+
+
+def listing_key(item: Dict[str, Any]) -> str:
+    """매물 내용(URL/이름/설명/가격) 기반 캐시 키. 하나라도 바뀌면 새로 작성한다."""
+
+    base = json.dumps(
+        [item.get("url", ""), item.get("name", ""), item.get("description", ""), float(item.get("price") or 0)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_path() -> str:
+    """INQUIRY_CACHE 설정 시 문의문 캐시를 파일로 유지 (짧게 뜨고 죽는 watch 프로세스 간 공유).
+
+    main()의 load_dotenv() 이후 값을 쓰도록 사용 시점에 읽는다.
+    """
+    return os.getenv("INQUIRY_CACHE", "")
+
+
+def _load_cache() -> Dict[str, str]:
+    global _cache
+    if _cache is None:
+        _cache = {}
+        path = _cache_path()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    _cache = dict(json.load(f))
+            except Exception:
+                _cache = {}
+    return _cache
+
+
+def _save_cache(cache: Dict[str, str]) -> None:
+    path = _cache_path()
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _parse_texts(result: Any, n: int) -> List[str]:
+    """컨테이너 출력에서 문의문 목록을 꺼낸다. (단건 ``text`` 응답도 허용)"""
+
+    if isinstance(result, dict):
+        texts = result.get("texts")
+        if texts is None:
+            texts = [result.get("text") or result.get("message") or ""]
+    elif isinstance(result, list):
+        texts = result
+    else:
+        texts = []
+    texts = [str(t or "").strip() for t in texts][:n]
+    return texts + [""] * (n - len(texts))
+
+
+def compose_inquiries(items: List[Dict[str, Any]]) -> List[str]:
+    """후보 매물 목록의 문의문을 입력 순서대로 반환한다.
+
+    캐시에 없는 매물만 모아 컨테이너를 한 번 실행하며, 컨테이너 안에서는
+    ``OLLAMA_NUM_PARALLEL`` 슬롯만큼 동시에 생성한다. 생성 실패한 항목은 빈 문자열.
+    스레드 안전: 동시에 호출되면 한 번에 하나씩 실행된다.
+    """
+
+    with _lock:
+        cache = _load_cache()
+        keys = [listing_key(x) for x in items]
+
+        # 같은 배치 안의 중복 매물도 한 번만 생성
+        todo: Dict[str, Dict[str, Any]] = {}
+        for k, x in zip(keys, items):
+            if k not in cache and k not in todo:
+                todo[k] = x
+
+        if todo:
+            prompts = [
+                build_prompt(x.get("name", ""), x.get("description", ""), float(x.get("price") or 0))
+                for x in todo.values()
+            ]
+            result = run_container("gpt-oss-20b-ollama", {"PROMPTS": json.dumps(prompts, ensure_ascii=False)})
+            for k, text in zip(todo, _parse_texts(result, len(prompts))):
+                if text:  # 실패한 항목은 캐시하지 않아 다음에 다시 시도
+                    cache[k] = text
+            _save_cache(cache)
+
+        return [cache.get(k, "") for k in keys]
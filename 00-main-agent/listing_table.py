@@ -0,0 +1,115 @@
+"""감시 중인 매물의 상태 테이블: 최초 발견 시각, 가격 이력, 판매 상태 전이."""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class ListingRecord:
+    """매물 1건의 누적 상태."""
+
+    key: str
+    item: Any                                                        # 가장 최근에 본 매물(Item)
+    first_seen: float
+    last_seen: float
+    price_history: List[Tuple[float, float]] = field(default_factory=list)   # (시각, 가격)
+    transitions: List[Tuple[float, str]] = field(default_factory=list)       # (시각, "available" | "sold_out")
+    available: bool = True
+    relevant: bool = False                                           # 관련도 필터를 통과해 평가 대상이었는지
+
+    @property
+    def price(self) -> float:
+        return self.price_history[-1][1] if self.price_history else 0.0
+
+
+@dataclass
+class Change:
+    """폴링 간 변경 1건. kind: ``new`` | ``price`` | ``sold_out`` | ``relisted``"""
+
+    kind: str
+    record: ListingRecord
+    old_price: Optional[float] = None
+
+
+class ListingTable:
+    """URL 기반 매물 키로 상태를 보관하고, 폴링 결과와의 차이만 계산한다.
+
+    폴링마다 하는 일은 이번 결과의 매물 수에만 비례하며, 누적된 전체 이력 크기와는 무관하다.
+    변경이 없는 매물은 Change를 만들지 않는다.
+    판매 완료는 검색 결과의 명시적 상태(SoldOut)로만 판정한다. 현재 매물 검색은 지역별 첫 페이지만
+    수집하므로, 결과에 없는 매물은 새 글에 밀려 "이번 폴링에서 보지 못한" 것일 수 있다.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, ListingRecord] = {}
+        self._available: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def get(self, key: str) -> Optional[ListingRecord]:
+        return self._records.get(key)
+
+    @property
+    def available_count(self) -> int:
+        return len(self._available)
+
+    def mark_relevant(self, key: str) -> None:
+        rec = self._records.get(key)
+        if rec is not None:
+            rec.relevant = True
+
+    def apply(self, listings: Iterable[Tuple[str, Any]], sold_out: Iterable[str] = (),
+              now: Optional[float] = None) -> List[Change]:
+        """이번 폴링의 결과를 반영하고 변경 목록을 반환한다.
+
+        Args:
+            listings: 판매 중으로 확인된 (키, Item) 목록
+            sold_out: 판매 완료로 표시된 매물 키 목록 (추적 중인 매물만 반영)
+            now: 기준 시각(기본 time.time())
+        """
+
+        now = time.time() if now is None else now
+        changes: List[Change] = []
+        present: Set[str] = set()
+
+        for key, item in listings:
+            if key in present:
+                continue
+            present.add(key)
+            price = float(item.price)
+            rec = self._records.get(key)
+
+            if rec is None:
+                rec = ListingRecord(key=key, item=item, first_seen=now, last_seen=now,
+                                    price_history=[(now, price)], transitions=[(now, "available")])
+                self._records[key] = rec
+                self._available.add(key)
+                changes.append(Change("new", rec))
+                continue
+
+            rec.item, rec.last_seen = item, now
+            if not rec.available:
+                rec.available = True
+                rec.transitions.append((now, "available"))
+                self._available.add(key)
+                changes.append(Change("relisted", rec, old_price=rec.price))
+            if price != rec.price:
+                old = rec.price
+                rec.price_history.append((now, price))
+                changes.append(Change("price", rec, old_price=old))
+
+        for key in sold_out:
+            rec = self._records.get(key)
+            if rec is None or not rec.available or key in present:
+                continue
+            rec.available = False
+            rec.last_seen = now
+            rec.transitions.append((now, "sold_out"))
+            self._available.discard(key)
+            changes.append(Change("sold_out", rec))
+        return changes
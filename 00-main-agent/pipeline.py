@@ -0,0 +1,248 @@
+"""이벤트 기반 딜 파이프라인: fetcher → dedup/filter → evaluator → drafter → notifier.
+
+각 단계는 크기 제한이 있는 asyncio.Queue로 연결되고 단계별 동시성을 따로 가진다.
+블로킹 작업(컨테이너 실행, LLM 호출, 웹훅 전송)은 스레드에서 실행한다.
+문의문 작성(drafter)은 모델 컨테이너를 동시에 여러 개 띄우지 않도록 단일 워커로 실행한다.
+fetcher는 하위 단계가 밀려도 기다리지 않는다. 큐가 가득 차면 해당 폴링 결과를 건너뛰고,
+아직 처리되지 않은 매물은 다음 폴링에서 다시 들어온다.
+"""
+
+import asyncio
+import json
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# --------- 알림 소비자(sink) ---------
+class Sink(ABC):
+    """딜 이벤트 소비자 기본형. ``emit``은 블로킹이어도 된다(스레드에서 호출)."""
+
+    @abstractmethod
+    def emit(self, event: Dict[str, Any]) -> None:
+        """딜 이벤트 1건을 전달한다."""
+
+    def close(self) -> None:
+        pass
+
+
+class StdoutSink(Sink):
+    """딜 이벤트를 사람이 읽기 쉬운 형태로 출력한다."""
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        item = event.get("item") or {}
+        print(f"🔔 [알림] {item.get('name')} · {float(item.get('price') or 0):,.0f}원 · {item.get('url')}")
+        if event.get("inquiry"):
+            print(f"   문의 문구: {event['inquiry']}")
+
+
+class JsonlSink(Sink):
+    """딜 이벤트를 JSON Lines 파일에 한 줄씩 추가한다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "a", encoding="utf-8")
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class WebhookSink(Sink):
+    """딜 이벤트를 JSON으로 로컬 엔드포인트에 POST 한다."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(event, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+SINKS: Dict[str, Callable[..., Sink]] = {
+    "stdout": StdoutSink,
+    "jsonl": JsonlSink,
+    "webhook": WebhookSink,
+}
+
+# 인자가 반드시 필요한 sink와 인자 설명
+SINK_ARGS: Dict[str, str] = {
+    "jsonl": "경로",
+    "webhook": "URL",
+}
+
+
+def parse_sink_spec(spec: str) -> Tuple[str, str]:
+    """``이름[:인자]`` 명세를 (이름, 인자)로 검증·분리한다. 잘못된 명세는 ValueError."""
+
+    name, _, arg = spec.partition(":")
+    name, arg = name.strip(), arg.strip()
+    if name not in SINKS:
+        raise ValueError(f"알 수 없는 sink '{name}' (가능: {', '.join(SINKS)})")
+    if name in SINK_ARGS and not arg:
+        raise ValueError(f"'{name}' sink에는 {SINK_ARGS[name]}가 필요합니다 (예: {name}:<{SINK_ARGS[name]}>)")
+    if name not in SINK_ARGS and arg:
+        raise ValueError(f"'{name}' sink는 인자를 받지 않습니다: '{spec}'")
+    return name, arg
+
+
+def make_sink(spec: str) -> Sink:
+    """``이름[:인자]`` 형식의 명세로 sink를 만든다. 예: ``stdout``, ``jsonl:deals.jsonl``, ``webhook:http://127.0.0.1:8000/hook``"""
+
+    name, arg = parse_sink_spec(spec)
+    return SINKS[name](arg) if arg else SINKS[name]()
+
+
+# --------- 파이프라인 ---------
+async def _drain(q: asyncio.Queue, first: Any, limit: int) -> List[Any]:
+    """이미 꺼낸 항목에 더해, 큐에 대기 중인 항목을 최대 limit개까지 모은다."""
+
+    batch = [first]
+    while len(batch) < limit:
+        try:
+            batch.append(q.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
+async def run_pipeline(
+    *,
+    fetch: Callable[[], Any],
+    ingest: Callable[[Any], Sequence[Any]],
+    evaluate: Callable[[List[Any]], List[Dict[str, Any]]],
+    sinks: Sequence[Sink],
+    poll_delay: Callable[[], float],
+    draft: Optional[Callable[[Dict[str, Any], Any], Dict[str, Any]]] = None,
+    snapshot: Optional[Callable[[], Any]] = None,
+    max_polls: int = 0,
+    queue_size: int = 64,
+    filter_workers: int = 1,
+    eval_workers: int = 2,
+    eval_batch: int = 10,
+    notify_workers: int = 1,
+) -> Dict[str, int]:
+    """파이프라인을 실행하고 단계별 처리 건수를 반환한다.
+
+    Args:
+        fetch: 현재 매물 검색 1회 (블로킹)
+        ingest: 검색 결과 → 평가할 신규 매물 목록 (빠른 로컬 처리)
+        evaluate: 신규 매물 묶음 → 딜 이벤트 목록 (LLM 호출, 블로킹)
+        sinks: 딜 이벤트 소비자 목록
+        poll_delay: 다음 폴링까지 대기 시간(초)
+        draft: (딜 이벤트, 스냅샷) → 문의문을 채운 이벤트 (블로킹, 단일 워커에서 순차 실행)
+        snapshot: draft 직전 이벤트 루프 스레드에서 호출해 공유 상태의 복사본을 만든다
+            (ingest가 같은 루프에서 상태를 바꾸므로 워커 스레드가 원본을 직접 순회하지 않게 함)
+        max_polls: 최대 폴링 횟수 (0이면 무제한)
+        queue_size: 단계 사이 큐 크기 (백프레셔 한도)
+        eval_batch: evaluator가 한 번에 모아 평가할 최대 매물 수
+    """
+
+    raw_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size // 8))
+    eval_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    draft_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    notify_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    deal_q = draft_q if draft else notify_q
+    stats = {"polls": 0, "skipped_polls": 0, "candidates": 0, "evaluated": 0, "deals": 0,
+             "filter_errors": 0, "sink_errors": 0}
+
+    async def fetcher() -> None:
+        while not max_polls or stats["polls"] < max_polls:
+            result = await asyncio.to_thread(fetch)
+            stats["polls"] += 1
+            try:
+                raw_q.put_nowait(result)
+            except asyncio.QueueFull:
+                # 하위 단계 적체 → 이번 결과는 건너뛰고 폴링 주기는 유지
+                stats["skipped_polls"] += 1
+                print("⚠️ [파이프라인] 처리 대기열이 가득 차 이번 검색 결과를 건너뜁니다.")
+            if max_polls and stats["polls"] >= max_polls:
+                break
+            await asyncio.sleep(poll_delay())
+
+    async def dedup_filter() -> None:
+        while True:
+            result = await raw_q.get()
+            try:
+                for item in ingest(result):
+                    stats["candidates"] += 1
+                    await eval_q.put(item)  # evaluator가 밀리면 여기서 대기 (fetcher는 영향 없음)
+            except Exception as e:
+                # 워커가 죽으면 raw_q가 비워지지 않아 종료 대기가 끝나지 않는다 → 이번 결과만 버리고 계속
+                stats["filter_errors"] += 1
+                print(f"⚠️ [파이프라인] 필터 단계 오류: {e}")
+            finally:
+                raw_q.task_done()
+
+    async def evaluator() -> None:
+        while True:
+            batch = await _drain(eval_q, await eval_q.get(), eval_batch)
+            try:
+                events = await asyncio.to_thread(evaluate, batch)
+                stats["evaluated"] += len(batch)
+                for ev in events:
+                    stats["deals"] += 1
+                    await deal_q.put(ev)
+            except Exception as e:
+                print(f"⚠️ [파이프라인] 평가 단계 오류: {e}")
+            finally:
+                for _ in batch:
+                    eval_q.task_done()
+
+    async def drafter() -> None:
+        while True:
+            ev = await draft_q.get()
+            try:
+                try:
+                    snap = snapshot() if snapshot else None
+                    ev = await asyncio.to_thread(draft, ev, snap)
+                except Exception as e:
+                    # 문의문 없이도 딜 알림은 보낸다
+                    print(f"⚠️ [파이프라인] 문의 작성 단계 오류: {e}")
+                await notify_q.put(ev)
+            finally:
+                draft_q.task_done()
+
+    async def notifier() -> None:
+        while True:
+            ev = await notify_q.get()
+            try:
+                ev = {"ts": time.time(), **ev}
+                for sink in sinks:
+                    try:
+                        await asyncio.to_thread(sink.emit, ev)
+                    except Exception as e:
+                        stats["sink_errors"] += 1
+                        print(f"⚠️ [파이프라인] {type(sink).__name__} 전송 실패: {e}")
+            finally:
+                notify_q.task_done()
+
+    workers = [
+        *(asyncio.create_task(dedup_filter()) for _ in range(max(1, filter_workers))),
+        *(asyncio.create_task(evaluator()) for _ in range(max(1, eval_workers))),
+        *([asyncio.create_task(drafter())] if draft else []),
+        *(asyncio.create_task(notifier()) for _ in range(max(1, notify_workers))),
+    ]
+    try:
+        await fetcher()
+        # 폴링 종료 후 앞 단계부터 순서대로 비운다
+        for q in (raw_q, eval_q, draft_q, notify_q):
+            await q.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for sink in sinks:
+            sink.close()
+    return stats
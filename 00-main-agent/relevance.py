@@ -0,0 +1,158 @@
+"""LLM 호출 전에 타겟 상품과 무관한 매물을 걸러내는 로컬 관련도 필터.
+
+상품명이 제목에 얼마나 들어 있는지(문자 n-gram 포함률) + 숫자/모델 구분어 일치 +
+제외 키워드 + 가격대 규칙을 조합한다. scikit-learn은 import 비용이 커서 필터를 처음 만들 때 불러온다.
+"""
+
+import re
+import statistics
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 실제 매물 제목으로 보정한 값: 타겟 제목은 0.7 이상, 다른 브랜드(롯데/현대 상품권 등)는 0.6 이하
+DEFAULT_MIN_SCORE = 0.65         # 상품명 n-gram 중 제목에 포함되어야 하는 최소 비율
+PRICE_BAND = (0.3, 3.0)          # 기준가 대비 허용 가격 배율 (하한, 상한)
+
+# 구매글/빈 박스 등 판매 중인 타겟 본품이 아닌 글의 키워드
+# (케이스/충전기 같은 액세서리 단어는 "케이스 포함"처럼 본품 제목에도 흔하므로 쓰지 않는다.
+#  액세서리 단품은 PRICE_BAND 하한에서 걸러진다.)
+NEGATIVE_KEYWORDS = (
+    "삽니다", "구매합니다", "구합니다", "구해요", "매입",
+    "박스만", "공박스", "부품용",
+)
+
+# 같은 제품군의 다른 모델을 가르는 단어: 상품명과 제목에서 있고 없음이 같아야 한다
+VARIANT_KEYWORDS = ("프로", "맥스", "플러스", "미니", "울트라")
+
+# 영문 표기 → 한글 표기 (정규화 후 비교)
+ALIASES = {
+    "iphone": "아이폰", "ipad": "아이패드", "galaxy": "갤럭시", "airpods": "에어팟",
+    "pro": "프로", "max": "맥스", "plus": "플러스", "mini": "미니", "ultra": "울트라",
+}
+
+_ALIAS = re.compile("|".join(sorted(ALIASES, key=len, reverse=True)))
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3})")
+_UNIT = re.compile(r"(\d+)\s*(만|천)")
+_NUMBER = re.compile(r"\d+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _norm(text: str) -> str:
+    """NFKC + 소문자 + 영문 별칭 치환 + 금액 단위 풀기("10만" → "100000")."""
+
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _THOUSANDS.sub("", text)
+    text = _UNIT.sub(lambda m: str(int(m.group(1)) * (10000 if m.group(2) == "만" else 1000)), text)
+    return _ALIAS.sub(lambda m: ALIASES[m.group(0)], text)
+
+
+def _letters(text: str) -> str:
+    """공백/특수문자/숫자를 뺀 글자만. 띄어쓰기("14프로" vs "14 프로")와 숫자 차이를 n-gram에서 제외한다."""
+
+    return _NUMBER.sub("", _NON_WORD.sub("", text))
+
+
+class RelevanceFilter:
+    """타겟 상품명 하나에 대한 관련도 필터.
+
+    Args:
+        item_name: 타겟 상품명
+        min_score: 통과 최소 포함률 (상품명 n-gram 중 제목에 있는 비율)
+        negative_keywords: 제외 키워드 (상품명에 포함된 키워드는 자동으로 제외 대상에서 빠짐)
+    """
+
+    def __init__(
+        self,
+        item_name: str,
+        min_score: float = DEFAULT_MIN_SCORE,
+        negative_keywords: Sequence[str] = NEGATIVE_KEYWORDS,
+    ):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.item_name = item_name
+        self.min_score = min_score
+        target = _norm(item_name)
+        # "아이폰 케이스"처럼 상품명 자체에 포함된 키워드는 제외하지 않는다
+        self.negative_keywords = [k for k in negative_keywords if _norm(k) not in target]
+        self.numbers = set(_NUMBER.findall(target))
+        self.variants = {k for k in VARIANT_KEYWORDS if k in target}
+
+        # 어휘를 상품명의 문자 1~2-gram으로 고정 → 제목별로 "상품명 n-gram 중 몇 개가 있는지"만 센다
+        letters = _letters(target)
+        vocab = sorted({letters[i:i + n] for n in (1, 2) for i in range(len(letters) - n + 1)})
+        self._vectorizer = (
+            CountVectorizer(analyzer="char", ngram_range=(1, 2), lowercase=False, binary=True, vocabulary=vocab)
+            if vocab else None
+        )
+
+    def scores(self, names: Sequence[str]):
+        """제목 목록의 상품명 포함률(0~1)을 한 번의 희소 행렬 연산으로 계산한다."""
+
+        if not names:
+            return []
+        if self._vectorizer is None:  # 상품명이 숫자뿐이면 숫자 규칙만 적용
+            return [1.0] * len(names)
+        X = self._vectorizer.transform([_letters(_norm(x)) for x in names])
+        return (X.sum(axis=1).A1 / len(self._vectorizer.vocabulary)).tolist()
+
+    def _mismatch(self, name: str) -> Optional[str]:
+        """숫자/모델 구분어 불일치 사유. 일치하면 None."""
+
+        missing = self.numbers - set(_NUMBER.findall(name))
+        if missing:
+            return f"숫자 불일치 '{min(missing)}'"
+        for k in VARIANT_KEYWORDS:
+            if (k in name) != (k in self.variants):
+                return f"다른 모델 '{k}'" if k in name else f"모델 구분어 '{k}' 없음"
+        return None
+
+    def split(
+        self,
+        items: Sequence[Dict],
+        reference_price: Optional[float] = None,
+    ) -> Tuple[List[Dict], List[Tuple[Dict, str]]]:
+        """매물을 (관련 매물, [(제외 매물, 사유)])로 나눈다.
+
+        Args:
+            items: {name, description, price, ...} 목록
+            reference_price: 가격대 규칙 기준가. 없으면 입력 가격의 중앙값 사용
+        """
+
+        if not items:
+            return [], []
+
+        scores = self.scores([x.get("name", "") for x in items])
+        prices = [float(x.get("price") or 0) for x in items]
+        ref = reference_price or statistics.median([p for p in prices if p > 0] or [0])
+        lo, hi = (ref * PRICE_BAND[0], ref * PRICE_BAND[1]) if ref > 0 else (0.0, float("inf"))
+
+        kept: List[Dict] = []
+        dropped: List[Tuple[Dict, str]] = []
+        for x, score, price in zip(items, scores, prices):
+            name = _norm(x.get("name", ""))
+            neg = next((k for k in self.negative_keywords if k in name), None)
+            if neg:
+                dropped.append((x, f"제외 키워드 '{neg}'"))
+            elif (reason := self._mismatch(name)) is not None:
+                dropped.append((x, reason))
+            elif score < self.min_score:
+                dropped.append((x, f"포함률 {score:.2f}"))
+            elif price > 0 and not (lo <= price <= hi):
+                dropped.append((x, f"가격대 이탈 {price:,.0f}원"))
+            else:
+                kept.append(x)
+        return kept, dropped
+
+
+# 상품명별 필터 캐시 (폴링마다 다시 만들지 않음)
+_FILTERS: Dict[str, RelevanceFilter] = {}
+
+
+def get_filter(item_name: str, min_score: float = DEFAULT_MIN_SCORE) -> RelevanceFilter:
+    """상품명별 필터를 캐시에서 꺼내거나, 없으면 만들어 등록한다."""
+
+    key = _norm(item_name)
+    if key not in _FILTERS:
+        _FILTERS[key] = RelevanceFilter(item_name, min_score=min_score)
+    _FILTERS[key].min_score = min_score
+    return _FILTERS[key]
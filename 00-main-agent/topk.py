@@ -0,0 +1,94 @@
+"""폴링 간에 누적되는 상위 K개 딜 랭킹."""
+
+import heapq
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_K = 5
+
+
+class TopKDeals:
+    """매물 식별자로 키잉된 상위 K개 후보를 최소 힙으로 유지한다.
+
+    - 힙에는 (점수, 버전, 키)를 넣고, 갱신/삭제된 항목은 버전 불일치로 걸러내는 지연 삭제 방식이다.
+    - 추가/점수 변경/삭제는 O(log K), 힙이 4K를 넘으면 유효 항목만으로 재구성한다.
+    - K개를 벗어나 밀려난 매물은 다시 기억하지 않으므로, 상위 매물이 팔리면 일시적으로 K개 미만일 수 있다.
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = max(1, int(k))
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, Tuple[float, int, Any]] = {}  # key -> (점수, 버전, 매물)
+        self._version = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        return entry[2] if entry else None
+
+    def _peek_min(self) -> Optional[Tuple[float, int, str]]:
+        """힙 최상단의 유효한(최신 버전) 항목. 오래된 항목은 버린다."""
+
+        while self._heap:
+            score, ver, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == ver:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def min_score(self) -> Optional[float]:
+        top = self._peek_min()
+        return top[0] if top else None
+
+    def update(self, key: str, score: float, item: Any) -> bool:
+        """매물을 추가하거나 점수를 갱신한다. 상위 K에 남으면 True."""
+
+        old = self._entries.get(key)
+        if old is not None and old[0] == score:
+            self._entries[key] = (score, old[1], item)  # 점수 동일 → 힙은 그대로 두고 매물 정보만 교체
+            return True
+        if old is None and len(self._entries) >= self.k:
+            floor = self.min_score()
+            if floor is not None and score <= floor:
+                return False
+
+        ver = next(self._version)
+        self._entries[key] = (score, ver, item)
+        heapq.heappush(self._heap, (score, ver, key))
+
+        kept = True
+        if len(self._entries) > self.k:
+            _, _, evicted = self._peek_min()
+            del self._entries[evicted]
+            heapq.heappop(self._heap)
+            kept = evicted != key
+        if len(self._heap) > 4 * self.k:
+            self._compact()
+        return kept
+
+    def remove(self, key: str) -> bool:
+        """판매 완료 등으로 더 이상 유효하지 않은 매물을 제거한다. (힙에서는 지연 삭제)"""
+
+        return self._entries.pop(key, None) is not None
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def _compact(self) -> None:
+        self._heap = [(score, ver, key) for key, (score, ver, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def ranked(self) -> List[Tuple[float, Any]]:
+        """점수 내림차순 (점수, 매물) 목록."""
+
+        return sorted(((score, item) for score, _, item in self._entries.values()),
+                      key=lambda si: si[0], reverse=True)
+
+    def __iter__(self) -> Iterator[Tuple[float, Any]]:
+        return iter(self.ranked())
@@ -1,10 +1,12 @@
 """당근마켓에서 매물 정보를 수집해 JSON으로 출력하는 스크립트."""
 
 import os, sys, json, re, time
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
 from urllib.parse import urlencode
-import requests
 from bs4 import BeautifulSoup
+import archive
+from http_client import CircuitBreaker, FetchError, HttpClient
 
 def _to_float(v: Any) -> float:
     """가격 문자열 등을 float 값으로 변환."""
@@ -29,117 +31,178 @@ def _as_dict(obj: Any) -> Dict[str, Any]:
         return _as_dict(obj[0])
     return {}
 
+def _is_itemlist(d: Any) -> bool:
+    return isinstance(d, dict) and "ItemList" in str(d.get("@type", ""))
+
+def _find_itemlist(html: str) -> Dict[str, Any]:
+    """HTML의 JSON-LD 스크립트에서 ItemList 데이터를 찾는다."""
+    soup = BeautifulSoup(html, "lxml")
+
+    for tag in soup.select('script[type="application/ld+json"]'):
+        txt = tag.string or tag.get_text() or ""
+        try:
+            data = json.loads(txt)
+        except Exception:
+            # 스크립트 태그에 다른 내용이 섞인 경우 뒷부분만 잘라 파싱
+            idx = max(txt.rfind("{"), txt.rfind("["))
+            if idx >= 0:
+                try:
+                    data = json.loads(txt[idx:])
+                except Exception:
+                    continue
+            else:
+                continue
+
+        if _is_itemlist(data):
+            return data
+        if isinstance(data, list):
+            for el in data:
+                if _is_itemlist(el):
+                    return el
+    return {}
+
+def parse_listings(html: str, mode: str) -> List[Dict[str, Any]]:
+    """검색 결과 페이지 HTML에서 매물 목록을 추출한다.
+
+    네트워크와 무관한 순수 함수이므로 아카이브 재처리(replay) 시 프로세스 풀에서 그대로 재사용한다.
+    """
+    items_data = _find_itemlist(html)
+    result: List[Dict[str, Any]] = []
+
+    for elem in items_data.get("itemListElement", []):
+        # itemListElement 구조에서 실제 아이템 정보 추출
+        if isinstance(elem, dict) and "item" in elem:
+            item = _as_dict(elem.get("item"))
+        elif isinstance(elem, dict):
+            item = elem
+        else:
+            item = {}
+        if not item:
+            continue
+
+        offers = _as_dict(item.get("offers", {}))
+        seller = _as_dict(offers.get("seller", {}))
+        availability = (offers.get("availability") or "").strip()
+        seller_type = seller.get("@type") or seller.get("type") or ""
+
+        # schema.org 값("https://schema.org/InStock")에서 상태 이름만 추출
+        status = str(availability).rsplit("/", 1)[-1]
+
+        row = {
+            "name": item.get("name", ""),
+            "description": item.get("description", ""),
+            "url": item.get("url", ""),
+            "price": _to_float(offers.get("price")),
+        }
+        if mode == "CURRENT":
+            # 개인 매물 중 판매 중/판매 완료만 전달 (예약 중 등은 제외)
+            # 판매 완료도 함께 넘겨야 에이전트가 "목록에서 밀려남"과 "팔림"을 구분할 수 있다
+            if seller_type != "Person" or status not in ("InStock", "SoldOut"):
+                continue
+            row["availability"] = status
+
+        result.append(row)
+    return result
+
+def _dedup_key(x: Dict[str, Any]):
+    return (x.get("name", ""), x.get("url", ""), x.get("price", 0.0))
+
+HEADERS = {
+    # 가벼운 User-Agent/언어 헤더 설정으로 차단 회피
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                  "KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "ko,en;q=0.9",
+}
+
+def _parse_regions(raw: str) -> List[str]:
+    """쉼표로 구분된 지역 목록을 순서를 유지한 채 중복 없이 분리한다."""
+    return list(dict.fromkeys(r.strip() for r in raw.split(",") if r.strip()))
+
 def main():
     # 입력 파라미터는 환경변수로 전달됨
     item_name = (os.getenv("ITEM_NAME") or "").strip()
     mode = (os.getenv("MODE") or "CURRENT").strip().upper()
-    region = (os.getenv("REGION") or "").strip()
+    regions = _parse_regions(os.getenv("REGION") or "")  # 예: "문정동-6184,가락동-6183"
+    archive_dir = (os.getenv("ARCHIVE_DIR") or "").strip()
+
+    if mode == "REPLAY":
+        # 네트워크 없이 아카이브된 페이지를 재파싱
+        workers = int(os.getenv("REPLAY_WORKERS") or 0) or None
+        result = archive.replay(archive_dir, parse_listings, workers=workers)
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+        return
 
     if mode not in ("ALL", "CURRENT"):
         mode = "CURRENT"
 
     base = "https://www.daangn.com/kr/buy-sell/"
-    urls: List[str] = []  # 수집 대상 URL 목록
+    targets: List[Tuple[str, str]] = []  # 수집 대상 (URL, 지역) 목록
 
     if mode == "ALL":
         # 과거 매물은 페이지를 돌며 수집
         for p in range(1, 4):
-            urls.append(f"{base}?{urlencode({'search': item_name, 'page': str(p)})}")
+            targets.append((f"{base}?{urlencode({'search': item_name, 'page': str(p)})}", ""))
     else:  # CURRENT
-        params = {"search": item_name}
-        if region:  # 지역 있으면 추가
-            params["in"] = region
-        urls.append(f"{base}?{urlencode(params)}")
-
-    result: List[Dict[str, Any]] = []
-    seen = set()  # 중복 아이템 제거용
-
-    headers = {
-        # 가벼운 User-Agent/언어 헤더 설정으로 차단 회피
-        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                      "KHTML, like Gecko) Chrome/124.0 Safari/537.36",
-        "Accept-Language": "ko,en;q=0.9",
-    }
-
-    for url in urls:
-        with requests.Session() as s:
-            s.headers.update(headers)
-            r = s.get(url, timeout=10)
-            r.raise_for_status()
-            r.encoding = r.apparent_encoding or r.encoding
-            html = r.text  # HTML 원문
-
-        soup = BeautifulSoup(html, "lxml")
-        items_data = None  # JSON-LD에서 상품 리스트 데이터 추출
-
-        for tag in soup.select('script[type="application/ld+json"]'):
-            txt = tag.string or tag.get_text() or ""
+        for region in regions or [""]:
+            params = {"search": item_name}
+            if region:  # 지역 있으면 추가
+                params["in"] = region
+            targets.append((f"{base}?{urlencode(params)}", region))
+
+    def crawl(target: Tuple[str, str]):
+        url, region = target
+        try:
+            r = client.get(url)
+        except FetchError as e:
+            return [], e
+        if archive_dir:
+            # 파싱 로직/페이지 구조 변경에 대비해 원문을 압축 보관 (opt-in)
+            # 보관 실패(권한/디스크 부족 등)는 수집 결과에 영향을 주지 않는다 → stderr에만 기록
             try:
-                data = json.loads(txt)
-            except Exception:
-                # 스크립트 태그에 다른 내용이 섞인 경우 뒷부분만 잘라 파싱
-                idx = max(txt.rfind("{"), txt.rfind("["))
-                if idx >= 0:
-                    try:
-                        data = json.loads(txt[idx:])
-                    except Exception:
-                        continue
-                else:
-                    continue
+                archive.save_page(archive_dir, r.text, {
+                    "url": url,
+                    "status": r.status_code,
+                    "encoding": r.encoding,
+                    "mode": mode,
+                    "item_name": item_name,
+                    "region": region,
+                })
+            except OSError as e:
+                print(f"⚠️ [아카이브] 페이지 저장 실패: {e}", file=sys.stderr, flush=True)
+        return [{**x, "region": region} for x in parse_listings(r.text, mode)], None
 
-            def is_itemlist(d):
-                return isinstance(d, dict) and "ItemList" in str(d.get("@type", ""))
-
-            if is_itemlist(data):
-                items_data = data; break
-            if isinstance(data, list):
-                for el in data:
-                    if is_itemlist(el):
-                        items_data = el; break
-            if items_data: break
-
-        if not items_data: continue
-
-        for elem in items_data.get("itemListElement", []):
-            # itemListElement 구조에서 실제 아이템 정보 추출
-            if isinstance(elem, dict) and "item" in elem:
-                item = _as_dict(elem.get("item"))
-            elif isinstance(elem, dict):
-                item = elem
-            else:
-                item = {}
-            if not item:
-                continue
-
-            offers = _as_dict(item.get("offers", {}))
-            seller = _as_dict(offers.get("seller", {}))
-            availability = (offers.get("availability") or "").strip()
-            seller_type = seller.get("@type") or seller.get("type") or ""
-
-            if mode == "CURRENT":
-                # 현재 판매 중인 개인 매물만 필터링
-                is_instock = (
-                    availability == "https://schema.org/InStock"
-                    or str(availability).endswith("InStock")
-                    or availability == "InStock"
-                )
-                if not (is_instock and seller_type == "Person"):
+    result: List[Dict[str, Any]] = []
+    errors: List[FetchError] = []
+    seen = set()  # 중복 아이템 제거용 (여러 지역에 걸친 매물은 먼저 나온 지역 기준)
+
+    # 지역/페이지를 하나의 풀링 세션으로 동시에 요청 → 전체 소요 시간 ≈ 가장 느린 요청
+    # 재시도/백오프/서킷 브레이커는 HttpClient가 담당 (한 지역이 막히면 나머지는 즉시 실패)
+    workers = min(len(targets), int(os.getenv("FETCH_WORKERS") or 8))
+    # 브레이커 상태는 BREAKER_STATE 파일로 다음 실행(다음 폴링)에 넘긴다 (에이전트가 볼륨을 마운트)
+    breaker = CircuitBreaker(state_path=(os.getenv("BREAKER_STATE") or "").strip())
+    with HttpClient(HEADERS, pool_size=workers, breaker=breaker) as client, ThreadPoolExecutor(max_workers=workers) as pool:
+        for listings, err in pool.map(crawl, targets):
+            if err is not None:
+                errors.append(err)
+            for x in listings:
+                key = _dedup_key(x)
+                if key in seen:
                     continue
-
-            key = (item.get("name", ""), item.get("url", ""), _to_float(offers.get("price")))
-            if key in seen:
-                continue
-            seen.add(key)
-
-            result.append({
-                "name": item.get("name", ""),
-                "description": item.get("description", ""),
-                "url": item.get("url", ""),
-                "price": _to_float(offers.get("price")),
-            })
+                seen.add(key)
+                result.append(x)
 
     # 로그 관찰을 위한 대기 로직
     time.sleep(5)
+    if errors:
+        # "매물 없음"과 구분되는 구조화된 오류 결과 (성공한 지역/페이지의 매물은 items로 함께 전달)
+        worst = max(errors, key=lambda e: (e.retry_after or 0, e.status or 0))
+        print(json.dumps({
+            "error": worst.to_dict(),
+            "failed": len(errors),
+            "total": len(targets),
+            "items": result,
+        }, ensure_ascii=False), flush=True)
+        return
     print(json.dumps(result, ensure_ascii=False), flush=True)
 
 if __name__ == "__main__":
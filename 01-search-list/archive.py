@@ -0,0 +1,121 @@
+"""수집한 검색 페이지 원문을 압축 보관하고, 오프라인으로 재파싱(replay)하는 모듈."""
+
+import os, json, gzip, hashlib, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard  # 있으면 zstd, 없으면 gzip으로 압축
+except ImportError:  # pragma: no cover - 선택 의존성
+    zstandard = None
+
+META_SUFFIX = ".meta.json"
+
+def _codec() -> str:
+    return "zst" if zstandard is not None else "gz"
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("zstd 아카이브를 읽으려면 zstandard 패키지가 필요합니다.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def save_page(archive_dir: str, html: str, meta: Dict[str, Any]) -> str:
+    """페이지 원문을 압축해 저장하고, 같은 이름의 메타데이터 파일을 함께 기록한다.
+
+    Args:
+        archive_dir: 아카이브 루트 디렉터리
+        html: 응답 HTML 원문
+        meta: url, status, mode 등 수집 시점 정보
+
+    Returns:
+        저장된 페이지 파일 경로
+    """
+    fetched_at = time.time()
+    day = time.strftime("%Y%m%d", time.gmtime(fetched_at))
+    digest = hashlib.sha1(meta.get("url", "").encode("utf-8")).hexdigest()[:12]
+    codec = _codec()
+
+    day_dir = os.path.join(archive_dir, day)
+    os.makedirs(day_dir, exist_ok=True)
+    stem = os.path.join(day_dir, f"{int(fetched_at * 1000)}-{digest}")
+    page_path = f"{stem}.html.{codec}"
+
+    with open(page_path, "wb") as f:
+        f.write(_compress(html.encode("utf-8"), codec))
+    # 메타데이터는 페이지 저장이 끝난 뒤 기록 → replay는 메타 파일 기준으로 완결된 페이지만 읽는다
+    with open(stem + META_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump({**meta, "fetched_at": fetched_at, "codec": codec,
+                   "file": os.path.basename(page_path)}, f, ensure_ascii=False)
+    return page_path
+
+def iter_pages(archive_dir: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """아카이브의 (페이지 파일 경로, 메타데이터)를 수집 시각 순으로 돌려준다."""
+    metas: List[Tuple[str, Dict[str, Any]]] = []
+    for root, _, files in os.walk(archive_dir):
+        for name in files:
+            if not name.endswith(META_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(root, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                continue
+            metas.append((os.path.join(root, meta.get("file", "")), meta))
+    metas.sort(key=lambda pm: pm[1].get("fetched_at", 0))
+    yield from metas
+
+def _replay_one(job: Tuple[str, Dict[str, Any], Callable[[str, str], List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """워커 프로세스에서 페이지 하나를 해제·파싱한다."""
+    page_path, meta, parse = job
+    try:
+        with open(page_path, "rb") as f:
+            html = _decompress(f.read(), meta.get("codec", "gz")).decode("utf-8", errors="replace")
+    except Exception:
+        return []
+    items = parse(html, meta.get("mode", "CURRENT"))
+    extra = {
+        "fetched_at": meta.get("fetched_at"),
+        "source_url": meta.get("url", ""),
+        "region": meta.get("region", ""),
+    }
+    return [{**x, **extra} for x in items]
+
+def replay(archive_dir: str, parse: Callable[[str, str], List[Dict[str, Any]]],
+           workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """아카이브 전체를 프로세스 풀에서 재파싱해 수집 시각 순 매물 이력을 반환한다.
+
+    Args:
+        archive_dir: 아카이브 루트 디렉터리
+        parse: ``(html, mode) -> 매물 목록`` 파서 (모듈 최상위 함수여야 pickle 가능)
+        workers: 프로세스 수. None이면 CPU 코어 수
+
+    Returns:
+        fetched_at/source_url/region이 덧붙은 매물 목록
+    """
+    if not archive_dir or not os.path.isdir(archive_dir):
+        return []
+
+    jobs = [(path, meta, parse) for path, meta in iter_pages(archive_dir)]
+    if not jobs:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    result: List[Dict[str, Any]] = []
+    if workers == 1:
+        for job in jobs:
+            result.extend(_replay_one(job))
+        return result
+
+    # HTML 파싱(BeautifulSoup/lxml)은 CPU 바운드 → 코어 수만큼 분산, map은 입력 순서를 유지
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for items in pool.map(_replay_one, jobs, chunksize=chunksize):
+            result.extend(items)
+    return result
@@ -0,0 +1,199 @@
+"""당근마켓 요청용 공용 HTTP 클라이언트: 커넥션 풀, 재시도/백오프, Retry-After, 호스트별 서킷 브레이커."""
+
+import json, os, random, sys, threading, time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import requests
+import requests.adapters
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class FetchError(Exception):
+    """요청 실패 정보. ``to_dict()``로 구조화된 오류 결과를 만든다."""
+
+    def __init__(self, message: str, kind: str = "http", status: Optional[int] = None,
+                 retry_after: Optional[float] = None, url: str = ""):
+        super().__init__(message)
+        self.kind = kind              # http | network | circuit_open
+        self.status = status
+        self.retry_after = retry_after
+        self.url = url
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.kind,
+            "status": self.status,
+            "message": str(self),
+            "retry_after": self.retry_after,
+            "url": self.url,
+        }
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환."""
+    v = (r.headers.get("Retry-After") or "").strip()
+    if not v:
+        return None
+    if v.isdigit():
+        return float(v)
+    try:
+        return max(0.0, parsedate_to_datetime(v).timestamp() - time.time())
+    except Exception:
+        return None
+
+class CircuitBreaker:
+    """호스트별 연속 실패가 임계값에 도달하면 cooldown 동안 요청을 즉시 거절한다.
+
+    cooldown이 지나면 요청 1건만 시험적으로 통과시키고(half-open), 성공하면 닫는다.
+    스크레이퍼는 폴링마다 새 컨테이너로 실행되므로, ``state_path``를 주면 실패 횟수/열린 시각을
+    파일에 저장해 다음 실행이 이어받는다. (프로세스가 바뀌어도 유효하도록 벽시계 시각 사용)
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 60.0, state_path: str = ""):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state_path = state_path
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: set = set()  # 시험 요청 중인 호스트는 실행 간에 넘기지 않는다
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                data = json.load(f)
+            for host, st in data.items():
+                self._failures[host] = int(st.get("failures", 0))
+                if st.get("opened_at") is not None:
+                    self._opened_at[host] = float(st["opened_at"])
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️ [서킷 브레이커] 상태 파일을 읽지 못해 초기화합니다: {e}", file=sys.stderr)
+
+    def _save(self) -> None:
+        """현재 상태를 파일에 기록 (lock 안에서 호출). 저장 실패는 수집에 영향을 주지 않는다."""
+        if not self.state_path:
+            return
+        data = {
+            host: {"failures": self._failures.get(host, 0), "opened_at": self._opened_at.get(host)}
+            for host in set(self._failures) | set(self._opened_at)
+        }
+        tmp = self.state_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            print(f"⚠️ [서킷 브레이커] 상태 저장 실패: {e}", file=sys.stderr)
+
+    def remaining(self, host: str) -> float:
+        opened = self._opened_at.get(host)
+        return max(0.0, opened + self.cooldown - time.time()) if opened is not None else 0.0
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            if host not in self._opened_at:
+                return True
+            if self.remaining(host) > 0 or host in self._probing:
+                return False
+            self._probing.add(host)  # half-open: 시험 요청 1건만 허용
+            return True
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            changed = host in self._failures or host in self._opened_at
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.discard(host)
+            if changed:
+                self._save()
+
+    def failure(self, host: str, hold: float = 0.0) -> None:
+        """실패 기록. ``hold``(예: Retry-After)가 cooldown보다 길면 그만큼 열어 둔다."""
+        with self._lock:
+            self._probing.discard(host)
+            n = self._failures.get(host, 0) + 1
+            self._failures[host] = n
+            if n >= self.threshold or host in self._opened_at:
+                # cooldown을 늘려 저장하는 대신 열린 시각을 미래로 밀어 hold를 반영
+                self._opened_at[host] = time.time() + max(0.0, hold - self.cooldown)
+            self._save()
+
+class HttpClient:
+    """재시도·서킷 브레이커가 적용된 스레드 공용 GET 클라이언트.
+
+    Args:
+        headers: 공통 요청 헤더
+        pool_size: 호스트당 커넥션 풀 크기 (동시 요청 수)
+        max_retries: 재시도 횟수 (첫 요청 제외)
+        backoff_base / backoff_cap: 지수 백오프 기준/상한(초), full jitter 적용
+        max_retry_after: 이보다 긴 Retry-After는 여기서 기다리지 않고 호출 측에 넘긴다
+    """
+
+    def __init__(self, headers: Dict[str, str], pool_size: int = 8, timeout: float = 10,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_cap: float = 20.0,
+                 max_retry_after: float = 30.0, breaker: Optional[CircuitBreaker] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.session.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str) -> requests.Response:
+        """GET 요청. 최종 실패 시 FetchError를 던진다."""
+        host = urlsplit(url).netloc
+        err: Optional[FetchError] = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow(host):
+                wait = round(self.breaker.remaining(host), 1) or None
+                if attempt:
+                    # 이번 요청의 재시도 중 브레이커가 열림 → 실제 마지막 오류를 돌려준다
+                    err.retry_after = max(err.retry_after or 0, wait or 0) or None
+                    raise err
+                raise FetchError(f"circuit open for {host}", kind="circuit_open", retry_after=wait, url=url)
+            try:
+                r = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.breaker.failure(host)
+                err, delay = FetchError(str(e), kind="network", url=url), self._backoff(attempt)
+            else:
+                if r.status_code < 400:
+                    self.breaker.success(host)
+                    r.encoding = r.apparent_encoding or r.encoding
+                    return r
+                if r.status_code not in RETRY_STATUSES:
+                    # 4xx 등 재시도해도 달라지지 않는 오류는 호스트 장애가 아니다 (서버는 응답함)
+                    # → half-open 시험 요청이었다면 브레이커를 닫아야 이후 요청이 계속 거절되지 않는다
+                    self.breaker.success(host)
+                    raise FetchError(f"HTTP {r.status_code}", status=r.status_code, url=url)
+
+                ra = _retry_after(r)
+                self.breaker.failure(host, hold=ra or 0.0)
+                err = FetchError(f"HTTP {r.status_code}", status=r.status_code, retry_after=ra, url=url)
+                if ra is not None and ra > self.max_retry_after:
+                    raise err  # 긴 대기는 에이전트 폴링 간격에서 처리
+                delay = ra if ra is not None else self._backoff(attempt)
+
+            if attempt == self.max_retries:
+                raise err
+            time.sleep(delay)
+        raise FetchError("unreachable", url=url)
@@ -10,4 +10,26 @@ docker run --rm \
 docker run --rm \
   -e ITEM_NAME="신세계상품권 10만원 권" \
   -e MODE=CURRENT \
-  search-list
\ No newline at end of file
+  search-list
+
+# 여러 지역 동시 검색 (쉼표 구분, 결과에 region 태그)
+docker run --rm \
+  -e ITEM_NAME="신세계상품권 10만원 권" \
+  -e MODE=CURRENT \
+  -e REGION="문정동-6184,중학동-6317" \
+  search-list
+
+# 수집 페이지 원문 아카이브 (opt-in)
+docker run --rm \
+  -e ITEM_NAME="신세계상품권 10만원 권" \
+  -e MODE=CURRENT \
+  -e ARCHIVE_DIR=/archive \
+  -v "$PWD/archive:/archive" \
+  search-list
+
+# 아카이브 오프라인 재파싱 (네트워크 미사용, 코어 수만큼 병렬)
+docker run --rm \
+  -e MODE=REPLAY \
+  -e ARCHIVE_DIR=/archive \
+  -v "$PWD/archive:/archive" \
+  search-list
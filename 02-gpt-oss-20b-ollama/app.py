@@ -2,18 +2,16 @@
 
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
 import requests
 
 OLLAMA_API = "http://localhost:11434/api/chat"
 
 
-def main() -> None:
-    """환경변수 ``PROMPT``를 읽어 모델을 호출하고 결과를 출력한다."""
-
-    prompt = os.getenv("PROMPT", "").strip()
-    if not prompt:
-        print(json.dumps({"error": "PROMPT env var is empty"}))
-        return
+def _chat(prompt: str) -> str:
+    """프롬프트 1건을 모델에 보내고 응답 본문을 반환한다."""
 
     payload = {
         "model": "gpt-oss:20b",  # 사용할 로컬 모델 이름
@@ -25,12 +23,50 @@ def main() -> None:
             "num_batch": 16,      # 배치 크기
         },
     }
+    resp = requests.post(OLLAMA_API, json=payload, timeout=600)
+    resp.raise_for_status()
+    data = resp.json()
+    return data.get("message", {}).get("content", "").strip()
+
+
+def _chat_many(prompts: List[str]) -> List[str]:
+    """같은 서버(모델 1회 로드)에 여러 프롬프트를 동시에 보낸다.
+
+    동시 요청 수는 서버 슬롯 수(``OLLAMA_NUM_PARALLEL``)에 맞춘다. 실패한 항목은 빈 문자열.
+    """
+
+    def one(prompt: str) -> str:
+        try:
+            return _chat(prompt)
+        except Exception:
+            return ""
+
+    workers = max(1, min(len(prompts), int(os.getenv("OLLAMA_NUM_PARALLEL") or 1)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, prompts))
+
+
+def main() -> None:
+    """환경변수 ``PROMPT`` 또는 ``PROMPTS``(JSON 배열)를 읽어 모델을 호출하고 결과를 출력한다."""
+
+    prompts_raw = os.getenv("PROMPTS", "").strip()
+    if prompts_raw:
+        try:
+            prompts = [str(p) for p in json.loads(prompts_raw)]
+        except Exception as e:
+            print(json.dumps({"error": f"PROMPTS must be a JSON array: {e}"}))
+            return
+        # 결과를 입력 순서 그대로 stdout에 JSON 형태로 출력
+        print(json.dumps({"texts": _chat_many(prompts)}, ensure_ascii=False))
+        return
+
+    prompt = os.getenv("PROMPT", "").strip()
+    if not prompt:
+        print(json.dumps({"error": "PROMPT env var is empty"}))
+        return
 
     try:
-        resp = requests.post(OLLAMA_API, json=payload, timeout=600)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("message", {}).get("content", "").strip()
+        content = _chat(prompt)
         # 결과를 stdout으로 JSON 형태로 출력
         print(json.dumps({"text": content}, ensure_ascii=False))
     except Exception as e:
@@ -39,4 +75,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-
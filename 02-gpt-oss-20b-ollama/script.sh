@@ -8,3 +8,9 @@ docker run --rm \
   -e PROMPT=$'너는 중고거래에서 판매자에게 보낼 정중한 문의문을 작성하는 AI다.\n다음 매물 정보를 참고해서 문의문을 작성하라.\n\n상품명: 아이폰 14 프로\n설명: 상태 좋음, 구성품 포함\n가격: 1,300,000원\n\n조건:\n- 2~3문장\n- 존댓말 사용\n- 거래 의사를 묻는 표현 포함' \
   -v ollama_data:/root/.ollama \
   gpt-oss-20b-ollama
+
+# 여러 문의문을 모델 1회 로드로 동시 생성 (PROMPTS: JSON 배열 → {"texts": [...]})
+docker run --rm \
+  -e PROMPTS='["상품명: 아이폰 14 프로, 가격: 1,300,000원 매물에 보낼 문의문을 2~3문장 존댓말로 작성하라.", "상품명: 아이패드 에어 5, 가격: 600,000원 매물에 보낼 문의문을 2~3문장 존댓말로 작성하라."]' \
+  -v ollama_data:/root/.ollama \
+  gpt-oss-20b-ollama